@@ -0,0 +1,144 @@
+"""
+Concurrency benchmark for the YouTube search path on a single worker.
+
+Starts a local stand-in of the YouTube Data API (search.list, videos.list,
+channels.list with an artificial per-call latency) and compares:
+
+  - blocking: the previous behaviour, three blocking round-trips per search
+    executed on the event loop thread, so searches run one after another
+  - async: YouTubeService.search_videos awaited concurrently through the
+    pooled async HTTP client
+
+Usage:
+    python benchmark_async_search.py --requests 50 --latency-ms 80
+"""
+import argparse
+import asyncio
+import os
+import socket
+import threading
+import time
+
+import requests
+import uvicorn
+from fastapi import FastAPI, Query
+
+LATENCY = 0.08
+
+stand_in = FastAPI()
+
+
+@stand_in.get("/youtube/v3/search")
+async def fake_search(q: str = Query(...), maxResults: int = Query(25)):
+    await asyncio.sleep(LATENCY)
+    return {
+        "nextPageToken": "NEXT",
+        "items": [
+            {
+                "id": {"videoId": f"{q}-{i}"},
+                "snippet": {"channelId": f"channel-{i % 5}", "title": f"Video {i}"}
+            }
+            for i in range(maxResults)
+        ]
+    }
+
+
+@stand_in.get("/youtube/v3/videos")
+async def fake_videos(id: str = Query(...)):
+    await asyncio.sleep(LATENCY)
+    return {
+        "items": [
+            {
+                "id": video_id,
+                "snippet": {
+                    "channelId": f"channel-{i % 5}",
+                    "title": f"Video {video_id}",
+                    "description": "",
+                    "channelTitle": f"Channel {i % 5}",
+                    "publishedAt": "2024-01-01T00:00:00Z",
+                    "thumbnails": {},
+                    "tags": ["benchmark"]
+                },
+                "statistics": {"viewCount": "1000", "likeCount": "10", "commentCount": "5"}
+            }
+            for i, video_id in enumerate(id.split(","))
+        ]
+    }
+
+
+@stand_in.get("/youtube/v3/channels")
+async def fake_channels(id: str = Query(...)):
+    await asyncio.sleep(LATENCY)
+    return {
+        "items": [
+            {"id": channel_id, "statistics": {"subscriberCount": "500"}}
+            for channel_id in id.split(",")
+        ]
+    }
+
+
+def start_stand_in() -> str:
+    """Run the stand-in API in a background thread and return its root URL"""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+
+    server = uvicorn.Server(uvicorn.Config(stand_in, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}/"
+
+
+def blocking_search(root_url: str, query: str) -> int:
+    """Previous behaviour: three sequential blocking upstream calls"""
+    base = root_url + "youtube/v3/"
+    search = requests.get(base + "search", params={"q": query, "maxResults": 25}, timeout=15).json()
+    video_ids = [item["id"]["videoId"] for item in search["items"]]
+    videos = requests.get(base + "videos", params={"id": ",".join(video_ids)}, timeout=15).json()
+    channel_ids = list(set(item["snippet"]["channelId"] for item in videos["items"]))
+    requests.get(base + "channels", params={"id": ",".join(channel_ids)}, timeout=15).json()
+    return len(videos["items"])
+
+
+async def run_blocking(root_url: str, count: int) -> float:
+    async def handler(i):
+        # A sync call inside an async route blocks the whole event loop
+        return blocking_search(root_url, f"q{i}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(handler(i) for i in range(count)))
+    return time.perf_counter() - start
+
+
+async def run_async(count: int) -> float:
+    from services.youtube_service import youtube_service
+
+    start = time.perf_counter()
+    await asyncio.gather(*(youtube_service.search_videos(query=f"q{i}") for i in range(count)))
+    return time.perf_counter() - start
+
+
+def main():
+    global LATENCY
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50, help="Concurrent searches")
+    parser.add_argument("--latency-ms", type=int, default=80, help="Stand-in latency per upstream call")
+    args = parser.parse_args()
+    LATENCY = args.latency_ms / 1000
+
+    root_url = start_stand_in()
+    os.environ["YOUTUBE_API_ROOT_URL"] = root_url
+    os.environ.setdefault("YOUTUBE_API_KEY", "benchmark-key")
+
+    blocking = asyncio.run(run_blocking(root_url, args.requests))
+    concurrent = asyncio.run(run_async(args.requests))
+
+    print(f"{args.requests} searches, {args.latency_ms} ms per upstream call, 1 worker")
+    print(f"  blocking: {blocking:7.2f}s  {args.requests / blocking:8.1f} searches/s")
+    print(f"  async:    {concurrent:7.2f}s  {args.requests / concurrent:8.1f} searches/s")
+
+
+if __name__ == "__main__":
+    main()
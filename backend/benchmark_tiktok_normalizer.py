@@ -0,0 +1,253 @@
+"""
+CPU benchmark for TikTok response normalization.
+
+Generates synthetic API items in both field layouts (TikTok Scraper's
+top-level fields and the nested 'statistics' / 'video' layout) and
+compares items/second of:
+
+  - legacy: the previous per-item resolution, walking every field's full
+    fallback chain and regex-scanning each description
+  - compiled: TikTokNormalizer, which detects the layout from the first
+    item and applies a precompiled extractor to the batch
+
+Both implementations are checked to produce the same output first.
+
+Usage:
+    python benchmark_tiktok_normalizer.py --items 2000 --rounds 50
+"""
+import argparse
+import gc
+import random
+import re
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from services.tiktok_normalizer import TikTokNormalizer
+
+
+def legacy_normalize(items: List[Dict]) -> List[Dict]:
+    """Previous implementation: every field resolved through its full chain per item"""
+    videos = []
+
+    for item in items:
+        try:
+            # TikTok Scraper API returns fields at top level, not nested
+            # Try top-level first, then fall back to nested structures
+
+            # Get counts - check top level first (TikTok Scraper format)
+            view_count = (
+                item.get('play_count') or
+                item.get('playCount') or
+                item.get('statistics', {}).get('playCount') or
+                item.get('statistics', {}).get('play_count') or
+                0
+            )
+            like_count = (
+                item.get('digg_count') or
+                item.get('diggCount') or
+                item.get('statistics', {}).get('diggCount') or
+                item.get('statistics', {}).get('digg_count') or
+                0
+            )
+            comment_count = (
+                item.get('comment_count') or
+                item.get('commentCount') or
+                item.get('statistics', {}).get('commentCount') or
+                item.get('statistics', {}).get('comment_count') or
+                0
+            )
+            share_count = (
+                item.get('share_count') or
+                item.get('shareCount') or
+                item.get('statistics', {}).get('shareCount') or
+                item.get('statistics', {}).get('share_count') or
+                0
+            )
+
+            # Author info
+            author = item.get('author', {}) or {}
+            subscriber_count = (
+                author.get('follower_count') or
+                author.get('followerCount') or
+                author.get('fans') or
+                0
+            )
+
+            # Get video ID
+            # Prioritize numeric video_id for embed compatibility
+            video_id = (
+                item.get('video_id') or
+                item.get('aweme_id') or
+                item.get('id') or
+                str(random.randint(100000, 999999))
+            )
+
+            # Get thumbnail - check top level first
+            cover_url = (
+                item.get('cover') or
+                item.get('ai_dynamic_cover') or
+                item.get('dynamic_cover') or
+                item.get('origin_cover') or
+                item.get('video', {}).get('cover') or
+                item.get('video', {}).get('dynamicCover') or
+                item.get('video', {}).get('originCover') or
+                'https://placehold.co/480x360?text=TikTok'
+            )
+
+            # Get description
+            desc = (
+                item.get('title') or
+                item.get('desc') or
+                item.get('description') or
+                item.get('text') or
+                ''
+            )
+
+            # Get create time
+            create_time = (
+                item.get('create_time') or
+                item.get('createTime') or
+                item.get('createtime') or
+                0
+            )
+            if create_time:
+                published_at = datetime.fromtimestamp(create_time).isoformat() + "Z"
+            else:
+                published_at = datetime.utcnow().isoformat() + "Z"
+
+            # Get author name
+            author_name = (
+                author.get('nickname') or
+                author.get('unique_id') or
+                author.get('uniqueId') or
+                'Unknown'
+            )
+
+            # Extract hashtags from description if not provided
+            tags = item.get('hashtags', []) or item.get('challenges', []) or []
+            if not tags and desc:
+                # Extract hashtags from description text
+                hashtags = re.findall(r'#(\w+)', desc)
+                tags = hashtags[:5]  # Limit to 5 tags
+
+            # Estimate follower count if not available
+            # Use engagement rate to estimate: typical TikTok engagement is 5-10%
+            # If we have views and likes, we can estimate
+            subscriber_count_estimated = False
+            if subscriber_count == 0 and view_count > 0:
+                # Estimate based on engagement (assuming 8% engagement rate)
+                estimated_followers = int(view_count / 8)  # Conservative estimate
+                subscriber_count = estimated_followers
+                subscriber_count_estimated = True
+
+            # Calculate ratio with estimated or real follower count
+            ratio = 0
+            if subscriber_count > 0:
+                ratio = (view_count / subscriber_count) * 100
+
+            video_data = {
+                'id': str(video_id),
+                'title': desc[:100] if desc else f'TikTok Video {video_id}',
+                'description': desc,
+                'channelTitle': author_name,
+                'publishedAt': published_at,
+                'thumbnails': {
+                    'default': {'url': cover_url, 'width': 120, 'height': 90},
+                    'medium': {'url': cover_url, 'width': 320, 'height': 180},
+                    'high': {'url': cover_url, 'width': 480, 'height': 360}
+                },
+                'tags': tags,
+                'statistics': {
+                    'viewCount': view_count,
+                    'likeCount': like_count,
+                    'commentCount': comment_count,
+                    'shareCount': share_count,
+                    'subscriberCount': subscriber_count,
+                    'subscriberCountEstimated': subscriber_count_estimated,
+                    'viewSubscriberRatio': round(ratio, 2)
+                }
+            }
+            videos.append(video_data)
+
+        except Exception as e:
+            print(f"[TikTok API] Error processing video item: {str(e)}")
+            continue
+
+    return videos
+
+
+def make_items(count: int, nested: bool) -> List[Dict]:
+    """Synthetic API items; about half the descriptions carry hashtags"""
+    items = []
+    for i in range(count):
+        desc = f"Video {i} #dance #fyp #trend{i % 7}" if i % 2 else f"Plain description {i}"
+        author = {"nickname": f"user{i % 50}", "unique_id": f"user_{i % 50}"}
+        if i % 3:
+            author["follower_count"] = 1000 + i
+        if nested:
+            item = {
+                "id": str(7000000000000000000 + i),
+                "desc": desc,
+                "createTime": 1700000000 + i,
+                "author": author,
+                "statistics": {"playCount": 5000 + i, "diggCount": 300 + i, "commentCount": i % 40, "shareCount": i % 9},
+                "video": {"cover": f"https://example.com/{i}.jpg"}
+            }
+        else:
+            item = {
+                "video_id": str(7000000000000000000 + i),
+                "aweme_id": str(7000000000000000000 + i),
+                "title": desc,
+                "create_time": 1700000000 + i,
+                "author": author,
+                "play_count": 5000 + i,
+                "digg_count": 300 + i,
+                "comment_count": i % 40,
+                "share_count": i % 9,
+                "cover": f"https://example.com/{i}.jpg",
+                "origin_cover": f"https://example.com/{i}-origin.jpg"
+            }
+        items.append(item)
+    return items
+
+
+def best_rates(implementations: Dict[str, Callable], items: List[Dict], rounds: int) -> Dict[str, float]:
+    """
+    Best items/second of each implementation over rounds.
+
+    Implementations take turns within every round so background noise
+    affects them alike; GC is paused while timing, like timeit does.
+    """
+    best = {name: float("inf") for name in implementations}
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            for name, normalize in implementations.items():
+                start = time.perf_counter()
+                normalize(items)
+                best[name] = min(best[name], time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return {name: len(items) / seconds for name, seconds in best.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=2000, help="Items per batch")
+    parser.add_argument("--rounds", type=int, default=50, help="Timed rounds (best is reported)")
+    args = parser.parse_args()
+
+    normalizer = TikTokNormalizer()
+    for layout, nested in (("top-level", False), ("nested", True)):
+        items = make_items(args.items, nested)
+        assert normalizer.normalize(items) == legacy_normalize(items), f"{layout}: outputs differ"
+
+        rates = best_rates({"legacy": legacy_normalize, "compiled": normalizer.normalize}, items, args.rounds)
+        print(f"{layout} layout, {args.items} items")
+        print(f"  legacy:   {rates['legacy']:10.0f} items/s")
+        print(f"  compiled: {rates['compiled']:10.0f} items/s  ({rates['compiled'] / rates['legacy']:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark for server-side top-k ranking across many search pages.
+
+Generates synthetic hydrated search pages (50 videos each, in our video
+format) one page at a time, the way the search loop receives them, and
+compares ranking them by a composite key (views/subscriber ratio):
+
+  - sort: materialize every result, then sort and slice (what ranking
+    after collecting all pages would do)
+  - heap: ranking.TopK, a bounded min-heap keeping only the best k
+
+Both are checked to return the same videos first. Reports the best time
+and the peak memory allocated while ranking (tracemalloc).
+
+Usage:
+    python benchmark_top_k.py --pages 200 --top-k 50 --rounds 5
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterator, List
+
+from services.ranking import SORT_KEYS, TopK
+
+PAGE_SIZE = 50
+
+
+def make_pages(count: int, seed: int = 1) -> Iterator[List[Dict]]:
+    """Synthetic hydrated search pages, produced lazily"""
+    rng = random.Random(seed)
+    for page in range(count):
+        videos = []
+        for i in range(PAGE_SIZE):
+            views = rng.randint(100, 5000000)
+            videos.append({
+                'id': f'video-{page}-{i}',
+                'title': f'Video {page}-{i}',
+                'description': 'x' * 200,
+                'channelTitle': f'Channel {i % 7}',
+                'publishedAt': '2024-01-01T00:00:00Z',
+                'thumbnails': {},
+                'tags': ['benchmark'],
+                'statistics': {
+                    'viewCount': views,
+                    'likeCount': views // 20,
+                    'commentCount': views // 500,
+                    'subscriberCount': rng.randint(0, 2000000),
+                    'viewSubscriberRatio': 0
+                }
+            })
+        yield videos
+
+
+def rank_by_sort(pages: Iterator[List[Dict]], k: int, key: Callable) -> List[Dict]:
+    """Collect every result, then sort"""
+    videos = []
+    for page in pages:
+        videos.extend(page)
+    videos.sort(key=key, reverse=True)
+    return videos[:k]
+
+
+def rank_by_heap(pages: Iterator[List[Dict]], k: int, key: Callable) -> List[Dict]:
+    """Keep the best k while scanning"""
+    ranked = TopK(k, key)
+    for page in pages:
+        for video in page:
+            ranked.push(video)
+    return ranked.items()
+
+
+def measure(rank: Callable, pages: int, k: int, key: Callable, rounds: int) -> Dict[str, float]:
+    """Best seconds over rounds (GC paused) and peak traced memory of one run"""
+    best = float("inf")
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            rank(make_pages(pages), k, key)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    rank(make_pages(pages), k, key)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": best, "peak": peak}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200, help="Search pages to rank (50 videos each)")
+    parser.add_argument("--top-k", type=int, default=50, help="Results to keep")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed rounds (best is reported)")
+    args = parser.parse_args()
+
+    key = SORT_KEYS['ratio']
+    expected = [video['id'] for video in rank_by_sort(make_pages(args.pages), args.top_k, key)]
+    assert [video['id'] for video in rank_by_heap(make_pages(args.pages), args.top_k, key)] == expected, "rankings differ"
+
+    print(f"{args.pages} pages x {PAGE_SIZE} videos, top {args.top_k} by views/subscriber ratio")
+    results = {
+        name: measure(rank, args.pages, args.top_k, key, args.rounds)
+        for name, rank in (("sort", rank_by_sort), ("heap", rank_by_heap))
+    }
+    for name, result in results.items():
+        print(f"  {name}: {result['seconds'] * 1000:8.1f} ms   peak {result['peak'] / 1024 / 1024:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,66 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Callable, Dict, List, Optional
 import os
+import tempfile
+import threading
+import time
 from pathlib import Path
 
 from urllib.parse import quote_plus
 
 class Settings(BaseSettings):
     youtube_api_key: Optional[str] = None
+    # Additional YouTube API keys (comma-separated) pooled with youtube_api_key
+    youtube_api_keys: Optional[str] = None
     tiktok_api_key: Optional[str] = None
     tiktok_rapidapi_host: str = "tiktok-scraper7.p.rapidapi.com"
+    # Connection limit of each dedicated per-host HTTP pool (e.g. RapidAPI)
+    http_max_connections_per_host: int = 20
+    # Persistent TikTok keyword -> challenge ID cache (keywords without a
+    # challenge are cached for the shorter negative TTL)
+    tiktok_challenge_cache_path: str = "tiktok_challenges.json"
+    tiktok_challenge_cache_ttl_seconds: int = 604800
+    tiktok_challenge_negative_ttl_seconds: int = 86400
+    tiktok_challenge_cache_max_entries: int = 5000
+    # Concurrent RapidAPI video-info requests per TikTok batch lookup
+    tiktok_detail_concurrency: int = 8
+    # Per-host circuit breaker: consecutive failures before failing fast,
+    # and seconds until a probe request is let through
+    circuit_breaker_failure_threshold: int = 5
+    circuit_breaker_reset_seconds: int = 30
+    # Latency budget of a TikTok search fanning out over several challenges
+    tiktok_fanout_time_budget_ms: int = 5000
+    # Override for the YouTube API root URL (e.g. a local stand-in for benchmarks)
+    youtube_api_root_url: Optional[str] = None
+    # In-process search page cache
+    search_cache_ttl_seconds: int = 300
+    search_cache_max_entries: int = 500
+    # Channel subscriber-count cache (counts change slowly)
+    channel_cache_ttl_seconds: int = 21600
+    channel_cache_max_entries: int = 10000
+    # Video statistics cache (stale entries are served while refreshing)
+    video_cache_ttl_seconds: int = 300
+    video_cache_max_entries: int = 10000
+    # How long IDs that videos.list doesn't return are remembered as not found
+    video_cache_missing_ttl_seconds: int = 60
+    # Budgets for filter-aware auto-pagination (fill mode)
+    fill_max_pages: int = 5
+    fill_time_budget_ms: int = 8000
+    # Default page budget of top-k searches (topK)
+    top_k_max_pages: int = 10
+    # Large-result mode (maxResults above 50): default page and time
+    # budgets, and pages in flight or buffered at once
+    large_result_max_pages: int = 20
+    large_result_time_budget_ms: int = 60000
+    large_result_pipeline_depth: int = 3
+    # Deadline of each platform in a cross-platform search (/api/search)
+    unified_search_timeout_ms: int = 4000
+    # YouTube quota budgets (units per Pacific-time day) and ledger file
+    youtube_daily_quota: int = 10000
+    youtube_user_daily_quota: Optional[int] = None
+    youtube_quota_ledger_path: str = "quota_ledger.json"
+    # Charges are written to the ledger file at most this often
+    youtube_quota_ledger_flush_seconds: float = 2.0
     secret_key: str = "your-secret-key-keep-it-secret"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
@@ -29,43 +81,35 @@ class Settings(BaseSettings):
         env_file = ".env"
         case_sensitive = False
         extra = "ignore"
+        # Snapshots are shared between requests; reload instead of mutating
+        frozen = True
 
     @classmethod
     def get_api_key(cls) -> Optional[str]:
         """Get YouTube API key from environment"""
-        settings = cls()
-        return settings.youtube_api_key
+        return get_settings().youtube_api_key
+
+    @classmethod
+    def get_api_keys(cls) -> List[str]:
+        """Get the YouTube API key pool (primary key first)"""
+        settings = get_settings()
+        keys = [settings.youtube_api_key] if settings.youtube_api_key else []
+        for key in (settings.youtube_api_keys or "").split(","):
+            key = key.strip()
+            if key and key not in keys:
+                keys.append(key)
+        return keys
 
     @classmethod
     def get_tiktok_api_key(cls) -> Optional[str]:
         """Get TikTok API key from environment"""
-        settings = cls()
-        return settings.tiktok_api_key
+        return get_settings().tiktok_api_key
     
     @classmethod
     def save_api_key(cls, api_key: str) -> bool:
         """Save API key to .env file"""
         try:
-            env_path = Path(".env")
-            
-            # Read existing content
-            existing_content = {}
-            if env_path.exists():
-                with open(env_path, 'r') as f:
-                    for line in f:
-                        line = line.strip()
-                        if line and not line.startswith('#') and '=' in line:
-                            key, value = line.split('=', 1)
-                            existing_content[key] = value
-            
-            # Update API key
-            existing_content['YOUTUBE_API_KEY'] = api_key
-            
-            # Write back
-            with open(env_path, 'w') as f:
-                for key, value in existing_content.items():
-                    f.write(f"{key}={value}\n")
-            
+            update_env({'YOUTUBE_API_KEY': api_key})
             return True
         except Exception as e:
             print(f"Error saving API key: {e}")
@@ -75,50 +119,30 @@ class Settings(BaseSettings):
     def delete_api_key(cls) -> bool:
         """Remove API key from .env file"""
         try:
-            env_path = Path(".env")
-            if not env_path.exists():
-                return True
-            
-            # Read and filter content
-            lines = []
-            with open(env_path, 'r') as f:
-                for line in f:
-                    if not line.strip().startswith('YOUTUBE_API_KEY='):
-                        lines.append(line)
-            
-            # Write back
-            with open(env_path, 'w') as f:
-                f.writelines(lines)
-            
+            update_env({'YOUTUBE_API_KEY': None})
             return True
         except Exception as e:
             print(f"Error deleting API key: {e}")
             return False
     
+    @classmethod
+    def save_api_keys(cls, primary: Optional[str], pool: List[str]) -> bool:
+        """Save the primary YouTube API key and the additional pooled keys together"""
+        try:
+            update_env({
+                'YOUTUBE_API_KEY': primary,
+                'YOUTUBE_API_KEYS': ','.join(pool) if pool else None
+            })
+            return True
+        except Exception as e:
+            print(f"Error saving API key pool: {e}")
+            return False
+    
     @classmethod
     def save_tiktok_api_key(cls, api_key: str) -> bool:
         """Save TikTok API key to .env file"""
         try:
-            env_path = Path(".env")
-            
-            # Read existing content
-            existing_content = {}
-            if env_path.exists():
-                with open(env_path, 'r') as f:
-                    for line in f:
-                        line = line.strip()
-                        if line and not line.startswith('#') and '=' in line:
-                            key, value = line.split('=', 1)
-                            existing_content[key] = value
-            
-            # Update TikTok API key
-            existing_content['TIKTOK_API_KEY'] = api_key
-            
-            # Write back
-            with open(env_path, 'w') as f:
-                for key, value in existing_content.items():
-                    f.write(f"{key}={value}\n")
-            
+            update_env({'TIKTOK_API_KEY': api_key})
             return True
         except Exception as e:
             print(f"Error saving TikTok API key: {e}")
@@ -128,24 +152,124 @@ class Settings(BaseSettings):
     def delete_tiktok_api_key(cls) -> bool:
         """Remove TikTok API key from .env file"""
         try:
-            env_path = Path(".env")
-            if not env_path.exists():
-                return True
-            
-            # Read and filter content
-            lines = []
-            with open(env_path, 'r') as f:
-                for line in f:
-                    if not line.strip().startswith('TIKTOK_API_KEY='):
-                        lines.append(line)
-            
-            # Write back
-            with open(env_path, 'w') as f:
-                f.writelines(lines)
-            
+            update_env({'TIKTOK_API_KEY': None})
             return True
         except Exception as e:
             print(f"Error deleting TikTok API key: {e}")
             return False
 
-settings = Settings()
+# Minimum seconds between checks of .env for changes
+ENV_CHECK_INTERVAL = 1.0
+
+_env_path = Path(Settings.Config.env_file)
+_snapshot: Optional[Settings] = None
+_snapshot_env_stamp = None
+_next_env_check = 0.0
+_reload_lock = threading.Lock()
+_listeners: List[Callable[[Settings], None]] = []
+
+# Held while settings are read-modified-written; reentrant so callers can
+# wrap a read and the update_env() call that depends on it
+settings_lock = threading.RLock()
+
+
+def _env_stamp():
+    try:
+        stat = _env_path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def add_settings_listener(callback: Callable[[Settings], None]):
+    """Call callback(new_settings) whenever a reload changes the settings"""
+    _listeners.append(callback)
+
+
+def reload_settings() -> Settings:
+    """Re-read .env and the environment and swap in a new settings snapshot"""
+    global _snapshot, _snapshot_env_stamp, _next_env_check
+    with _reload_lock:
+        previous = _snapshot
+        stamp = _env_stamp()
+        try:
+            snapshot = Settings()
+        except Exception as e:
+            if previous is None:
+                raise
+            # Keep serving the last good snapshot
+            print(f"[Settings] Could not reload settings: {e}")
+            snapshot = previous
+        _snapshot, _snapshot_env_stamp = snapshot, stamp
+        _next_env_check = time.monotonic() + ENV_CHECK_INTERVAL
+
+    if previous is not None and snapshot != previous:
+        for callback in list(_listeners):
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"[Settings] Change listener failed: {e}")
+    return snapshot
+
+
+def update_env(updates: Dict[str, Optional[str]]) -> Settings:
+    """
+    Set (or, for None values, remove) variables in .env and reload.
+
+    Other lines, including comments, are kept. The new file is written to a
+    temp file and renamed over .env, so readers never see a partial file,
+    and concurrent updates are serialized so none is lost.
+    """
+    with settings_lock:
+        lines = []
+        if _env_path.exists():
+            with open(_env_path, 'r') as f:
+                lines = f.read().splitlines()
+
+        pending = dict(updates)
+        new_lines = []
+        for line in lines:
+            name = line.split('=', 1)[0].strip() if '=' in line and not line.lstrip().startswith('#') else None
+            if name in updates:
+                if name in pending and pending[name] is not None:
+                    new_lines.append(f"{name}={pending[name]}")
+                pending.pop(name, None)
+            else:
+                new_lines.append(line)
+        new_lines += [f"{name}={value}" for name, value in pending.items() if value is not None]
+
+        directory = _env_path.resolve().parent
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.env-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write('\n'.join(new_lines) + '\n' if new_lines else '')
+            if _env_path.exists():
+                os.chmod(tmp_path, _env_path.stat().st_mode & 0o777)
+            os.replace(tmp_path, _env_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return reload_settings()
+
+
+def get_settings() -> Settings:
+    """
+    Current settings snapshot.
+
+    The snapshot is immutable and replaced as a whole, so callers always see
+    a consistent set of values. It is re-read only when .env changes (checked
+    at most every ENV_CHECK_INTERVAL seconds) or after the settings routes
+    write it; otherwise this is an attribute read.
+    """
+    global _next_env_check
+    if time.monotonic() >= _next_env_check:
+        if _env_stamp() != _snapshot_env_stamp:
+            return reload_settings()
+        _next_env_check = time.monotonic() + ENV_CHECK_INTERVAL
+    return _snapshot
+
+
+# Snapshot at startup; sizing values read at import time (caches, pools,
+# quotas) come from here
+settings = reload_settings()
@@ -1,6 +1,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routes import youtube, settings, tiktok, auth
+from routes import youtube, settings, tiktok, auth, metrics, search
+from services.http_client import close_http_client
+from services.quota import quota_ledger
+from services.tiktok_service import tiktok_service
 from database import engine
 from models import Base
 
@@ -26,7 +29,15 @@ app.add_middleware(
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(youtube.router)
 app.include_router(tiktok.router)
+app.include_router(search.router)
 app.include_router(settings.router)
+app.include_router(metrics.router)
+
+@app.on_event("shutdown")
+async def shutdown():
+    await close_http_client()
+    quota_ledger.flush()
+    tiktok_service.challenge_cache.flush()
 
 @app.get("/")
 async def root():
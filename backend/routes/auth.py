@@ -5,10 +5,9 @@ from database import get_db
 from models import User
 from auth_utils import verify_password, get_password_hash, create_access_token
 from datetime import timedelta
-from config import Settings
+from config import get_settings
 
 router = APIRouter()
-settings = Settings()
 
 class UserCreate(BaseModel):
     username: str
@@ -30,7 +29,7 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(db_user)
     
-    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
+    access_token_expires = timedelta(minutes=get_settings().access_token_expire_minutes)
     access_token = create_access_token(
         data={"sub": db_user.username}, expires_delta=access_token_expires
     )
@@ -46,7 +45,7 @@ def login(user: UserCreate, db: Session = Depends(get_db)):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
+    access_token_expires = timedelta(minutes=get_settings().access_token_expire_minutes)
     access_token = create_access_token(
         data={"sub": db_user.username}, expires_delta=access_token_expires
     )
@@ -0,0 +1,28 @@
+from fastapi import APIRouter
+from services.youtube_service import youtube_service
+from services.tiktok_service import tiktok_service
+from services.circuit_breaker import circuit_breaker_stats
+
+router = APIRouter(prefix="/api/metrics", tags=["metrics"])
+
+@router.get("")
+async def get_metrics():
+    """
+    Cache and request-coalescing statistics for the search services, and
+    upstream circuit breaker states
+    """
+    return {
+        "youtube": {
+            "searchCache": youtube_service.page_cache.stats(),
+            "channelCache": youtube_service.channel_cache.stats(),
+            "videoCache": youtube_service.video_cache.stats(),
+            "searchCoalescing": youtube_service.search_flight.stats()
+        },
+        "tiktok": {
+            "searchCache": tiktok_service.page_cache.stats(),
+            "challengeCache": tiktok_service.challenge_cache.stats(),
+            "searchCoalescing": tiktok_service.search_flight.stats(),
+            "detailCoalescing": tiktok_service.detail_flight.stats()
+        },
+        "circuitBreakers": circuit_breaker_stats()
+    }
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, Query, HTTPException
+from auth_utils import get_request_user
+from services.search_service import unified_search_service, parse_platforms
+from typing import Optional
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+@router.get("")
+async def search_videos(
+    q: str = Query(..., description="Search query"),
+    platforms: str = Query("youtube,tiktok", description="Comma-separated platforms: youtube, tiktok"),
+    maxResults: int = Query(25, ge=1, le=50, description="Maximum results per platform"),
+    sortBy: str = Query("ratio", description="Ranking of the merged results: ratio, views, likes, comments, recency, engagement"),
+    order: str = Query("relevance", description="Upstream sort order: date, rating, relevance, viewCount"),
+    publishedAfter: Optional[str] = Query(None, description="Filter by date: 1m, 2m, 6m, 1y, all"),
+    videoDuration: Optional[str] = Query(None, description="Filter by duration: short, long, any"),
+    minRatio: Optional[float] = Query(None, description="Minimum views/subscriber ratio"),
+    minComments: Optional[int] = Query(None, description="Minimum comment count"),
+    tag: Optional[str] = Query(None, description="Filter by tag"),
+    pageToken: Optional[str] = Query(None, description="Page token for pagination"),
+    timeoutMs: Optional[int] = Query(None, ge=100, le=60000, description="Deadline per platform (ms)"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. title,statistics.viewCount"),
+    user: str = Depends(get_request_user)
+):
+    """
+    Search several platforms concurrently and return one merged, ranked list
+    """
+    try:
+        return await unified_search_service.search(
+            query=q,
+            platforms=parse_platforms(platforms),
+            max_results=maxResults,
+            sort_by=sortBy,
+            order=order,
+            published_after=publishedAfter,
+            video_duration=videoDuration,
+            min_ratio=minRatio,
+            min_comments=minComments,
+            tag=tag,
+            page_token=pageToken,
+            timeout_ms=timeoutMs,
+            user=user,
+            fields=fields
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -41,6 +41,42 @@ async def delete_api_key():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/api-keys")
+async def get_api_key_pool_status():
+    """
+    List the YouTube API key pool with per-key quota usage
+    """
+    try:
+        return settings_service.get_api_key_pool_status()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/api-keys")
+async def add_pool_api_key(request: ApiKeyRequest):
+    """
+    Add a YouTube API key to the pool
+    """
+    try:
+        result = settings_service.add_pool_api_key(request.apiKey)
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/api-keys/{key_id}")
+async def delete_pool_api_key(key_id: str):
+    """
+    Remove a YouTube API key from the pool
+    """
+    try:
+        result = settings_service.delete_pool_api_key(key_id)
+        return result
+    except KeyError:
+        raise HTTPException(status_code=404, detail="API key not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/tiktok-api-key")
 async def get_tiktok_api_key_status():
     """
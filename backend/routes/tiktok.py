@@ -1,26 +1,36 @@
 from fastapi import APIRouter, Query, HTTPException
-from services.tiktok_service import tiktok_service
-from typing import Optional
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from services.circuit_breaker import CircuitOpenError
+from services.streaming import MEDIA_TYPES, open_stream
+from services.tiktok_service import tiktok_service, MAX_LARGE_RESULTS
+from typing import List, Optional
 
 router = APIRouter(prefix="/api/tiktok", tags=["tiktok"])
 
+class VideoBatchRequest(BaseModel):
+    ids: List[str]
+
 @router.get("/search")
 async def search_videos(
     q: str = Query(..., description="Search query"),
-    maxResults: int = Query(25, ge=1, le=50, description="Maximum results"),
+    maxResults: int = Query(25, ge=1, le=MAX_LARGE_RESULTS, description="Maximum results (above 50: large-result mode)"),
     order: str = Query("relevance", description="Sort order: date, rating, relevance, viewCount"),
     publishedAfter: Optional[str] = Query(None, description="Filter by date: 1m, 2m, 6m, 1y, all"),
     videoDuration: Optional[str] = Query(None, description="Filter by duration: short, long, any"),
     minRatio: Optional[float] = Query(None, description="Minimum views/subscriber ratio"),
     minComments: Optional[int] = Query(None, description="Minimum comment count"),
     tag: Optional[str] = Query(None, description="Filter by tag"),
-    pageToken: Optional[str] = Query(None, description="Page token for pagination")
+    pageToken: Optional[str] = Query(None, description="Page token for pagination"),
+    challenges: int = Query(1, ge=1, le=5, description="Number of matching challenges to search concurrently"),
+    timeBudgetMs: Optional[int] = Query(None, ge=100, le=60000, description="Latency budget (ms) for multi-challenge searches; whole-search budget above 50 results"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. title,statistics.viewCount")
 ):
     """
     Search for TikTok videos with filters
     """
     try:
-        result = tiktok_service.search_videos(
+        result = await tiktok_service.search_videos(
             query=q,
             max_results=maxResults,
             order=order,
@@ -29,7 +39,10 @@ async def search_videos(
             min_ratio=minRatio,
             min_comments=minComments,
             tag=tag,
-            page_token=pageToken
+            page_token=pageToken,
+            challenges=challenges,
+            time_budget_ms=timeBudgetMs,
+            fields=fields
         )
         return result
     except ValueError as e:
@@ -37,16 +50,77 @@ async def search_videos(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/search/stream")
+async def stream_search_videos(
+    q: str = Query(..., description="Search query"),
+    maxResults: int = Query(25, ge=1, le=MAX_LARGE_RESULTS, description="Maximum results (above 50: large-result mode)"),
+    order: str = Query("relevance", description="Sort order: date, rating, relevance, viewCount"),
+    publishedAfter: Optional[str] = Query(None, description="Filter by date: 1m, 2m, 6m, 1y, all"),
+    videoDuration: Optional[str] = Query(None, description="Filter by duration: short, long, any"),
+    minRatio: Optional[float] = Query(None, description="Minimum views/subscriber ratio"),
+    minComments: Optional[int] = Query(None, description="Minimum comment count"),
+    tag: Optional[str] = Query(None, description="Filter by tag"),
+    pageToken: Optional[str] = Query(None, description="Page token for pagination"),
+    challenges: int = Query(1, ge=1, le=5, description="Number of matching challenges to search concurrently"),
+    timeBudgetMs: Optional[int] = Query(None, ge=100, le=60000, description="Latency budget (ms) for multi-challenge searches; whole-search budget above 50 results"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. title,statistics.viewCount"),
+    format: str = Query("ndjson", description="Stream format: ndjson or sse")
+):
+    """
+    Search for TikTok videos as an event stream (same events as /api/videos/search/stream)
+    """
+    try:
+        events = tiktok_service.stream_search(
+            query=q,
+            max_results=maxResults,
+            order=order,
+            published_after=publishedAfter,
+            video_duration=videoDuration,
+            min_ratio=minRatio,
+            min_comments=minComments,
+            tag=tag,
+            page_token=pageToken,
+            challenges=challenges,
+            time_budget_ms=timeBudgetMs,
+            fields=fields
+        )
+        body = await open_stream(events, format)
+        return StreamingResponse(body, media_type=MEDIA_TYPES[format], headers={"Cache-Control": "no-cache"})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/batch")
+async def get_videos_batch(
+    request: VideoBatchRequest,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. title,statistics.viewCount")
+):
+    """
+    Get details for up to 100 videos in one request
+    """
+    try:
+        return await tiktok_service.get_videos_batch(request.ids, fields=fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{video_id}")
-async def get_video(video_id: str):
+async def get_video(
+    video_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. title,statistics.viewCount")
+):
     """
     Get detailed information about a specific video
     """
     try:
-        video = tiktok_service.get_video_details(video_id)
+        video = await tiktok_service.get_video_details(video_id, fields=fields)
         if not video:
             raise HTTPException(status_code=404, detail="Video not found")
         return video
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
@@ -1,26 +1,42 @@
-from fastapi import APIRouter, Query, HTTPException
-from services.youtube_service import youtube_service
-from typing import Optional
+from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from auth_utils import get_request_user
+from services.quota import QuotaExceededError
+from services.streaming import MEDIA_TYPES, open_stream
+from services.youtube_client import youtube_client_manager
+from services.youtube_service import youtube_service, MAX_LARGE_RESULTS, MAX_TOP_K
+from typing import List, Optional
 
 router = APIRouter(prefix="/api/videos", tags=["videos"])
 
+class VideoBatchRequest(BaseModel):
+    ids: List[str]
+
 @router.get("/search")
 async def search_videos(
     q: str = Query(..., description="Search query"),
-    maxResults: int = Query(25, ge=1, le=50, description="Maximum results"),
+    maxResults: int = Query(25, ge=1, le=MAX_LARGE_RESULTS, description="Maximum results (above 50: large-result mode)"),
     order: str = Query("relevance", description="Sort order: date, rating, relevance, viewCount"),
     publishedAfter: Optional[str] = Query(None, description="Filter by date: 1m, 2m, 6m, 1y, all"),
     videoDuration: Optional[str] = Query(None, description="Filter by duration: short, long, any"),
     minRatio: Optional[float] = Query(None, description="Minimum views/subscriber ratio"),
     minComments: Optional[int] = Query(None, description="Minimum comment count"),
     tag: Optional[str] = Query(None, description="Filter by tag"),
-    pageToken: Optional[str] = Query(None, description="Page token for pagination")
+    pageToken: Optional[str] = Query(None, description="Page token for pagination"),
+    fill: bool = Query(False, description="Fetch more pages until maxResults videos pass the filters"),
+    maxPages: Optional[int] = Query(None, ge=1, le=20, description="Page budget for fill mode"),
+    timeBudgetMs: Optional[int] = Query(None, ge=100, le=60000, description="Time budget for fill mode (ms)"),
+    sortBy: Optional[str] = Query(None, description="Rank results by: views, likes, comments, recency, ratio, engagement"),
+    topK: Optional[int] = Query(None, ge=1, le=MAX_TOP_K, description="Return the top K results by sortBy across up to maxPages pages"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. title,statistics.viewCount"),
+    user: str = Depends(get_request_user)
 ):
     """
     Search for YouTube videos with filters
     """
     try:
-        result = youtube_service.search_videos(
+        result = await youtube_service.search_videos(
             query=q,
             max_results=maxResults,
             order=order,
@@ -29,24 +45,118 @@ async def search_videos(
             min_ratio=minRatio,
             min_comments=minComments,
             tag=tag,
-            page_token=pageToken
+            page_token=pageToken,
+            fill=fill,
+            max_pages=maxPages,
+            time_budget_ms=timeBudgetMs,
+            sort_by=sortBy,
+            top_k=topK,
+            user=user,
+            fields=fields
         )
         return result
+    except QuotaExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/search/stream")
+async def stream_search_videos(
+    q: str = Query(..., description="Search query"),
+    maxResults: int = Query(25, ge=1, le=MAX_LARGE_RESULTS, description="Maximum results (above 50: large-result mode)"),
+    order: str = Query("relevance", description="Sort order: date, rating, relevance, viewCount"),
+    publishedAfter: Optional[str] = Query(None, description="Filter by date: 1m, 2m, 6m, 1y, all"),
+    videoDuration: Optional[str] = Query(None, description="Filter by duration: short, long, any"),
+    minRatio: Optional[float] = Query(None, description="Minimum views/subscriber ratio"),
+    minComments: Optional[int] = Query(None, description="Minimum comment count"),
+    tag: Optional[str] = Query(None, description="Filter by tag"),
+    pageToken: Optional[str] = Query(None, description="Page token for pagination"),
+    fill: bool = Query(False, description="Fetch more pages until maxResults videos pass the filters"),
+    maxPages: Optional[int] = Query(None, ge=1, le=20, description="Page budget for fill mode"),
+    timeBudgetMs: Optional[int] = Query(None, ge=100, le=60000, description="Time budget for fill mode (ms)"),
+    sortBy: Optional[str] = Query(None, description="Rank results by: views, likes, comments, recency, ratio, engagement"),
+    topK: Optional[int] = Query(None, ge=1, le=MAX_TOP_K, description="Return the top K results by sortBy across up to maxPages pages"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. title,statistics.viewCount"),
+    format: str = Query("ndjson", description="Stream format: ndjson or sse"),
+    user: str = Depends(get_request_user)
+):
+    """
+    Search for YouTube videos, streaming each result as soon as it is ready
+
+    Emits a 'video' event per result and a final 'summary' event with the
+    search response fields (nextPageToken, quotaUsed, ...).
+    """
+    try:
+        events = youtube_service.stream_search(
+            query=q,
+            max_results=maxResults,
+            order=order,
+            published_after=publishedAfter,
+            video_duration=videoDuration,
+            min_ratio=minRatio,
+            min_comments=minComments,
+            tag=tag,
+            page_token=pageToken,
+            fill=fill,
+            max_pages=maxPages,
+            time_budget_ms=timeBudgetMs,
+            sort_by=sortBy,
+            top_k=topK,
+            user=user,
+            fields=fields
+        )
+        body = await open_stream(events, format)
+        return StreamingResponse(body, media_type=MEDIA_TYPES[format], headers={"Cache-Control": "no-cache"})
+    except QuotaExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/quota")
+async def get_quota(user: str = Depends(get_request_user)):
+    """
+    Today's YouTube quota usage and remaining budget
+    """
+    return youtube_client_manager.quota_status(user)
+
+@router.post("/batch")
+async def get_videos_batch(
+    request: VideoBatchRequest,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. title,statistics.viewCount"),
+    user: str = Depends(get_request_user)
+):
+    """
+    Get details for up to 500 videos in one request
+    """
+    try:
+        return await youtube_service.get_videos_batch(request.ids, user=user, fields=fields)
+    except QuotaExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{video_id}")
-async def get_video(video_id: str):
+async def get_video(
+    video_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. title,statistics.viewCount"),
+    user: str = Depends(get_request_user)
+):
     """
     Get detailed information about a specific video
     """
     try:
-        video = youtube_service.get_video_details(video_id)
+        video = await youtube_service.get_video_details(video_id, user=user, fields=fields)
         if not video:
             raise HTTPException(status_code=404, detail="Video not found")
         return video
+    except QuotaExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
@@ -0,0 +1,314 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+
+class TTLCache:
+    """
+    Bounded in-process cache with per-entry TTL and LRU eviction.
+
+    Expired entries are dropped lazily on access; when the cache is full the
+    least recently used entry is evicted to make room.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _now(self) -> float:
+        return time.monotonic()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > self._now():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store value under key, evicting the least recently used entries if full"""
+        expires_at = self._now() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxEntries": self.max_entries,
+                "ttlSeconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class PersistentTTLCache(TTLCache):
+    """
+    TTLCache for long-lived string-keyed entries that survives restarts.
+
+    Expiry uses wall-clock time and writes are saved to a JSON file (via a
+    temp file and rename, so a crash never leaves it half written) at most
+    every `flush_interval` seconds from a background thread, and by flush()
+    on shutdown, so requests never wait for the disk. Meant for small,
+    rarely written mappings; values must be JSON-serializable.
+    """
+
+    def __init__(self, path: str, ttl: float, max_entries: int, flush_interval: float = 2.0):
+        super().__init__(ttl, max_entries)
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        # Serializes file writes, which happen outside _lock
+        self._write_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._load()
+
+    def _now(self) -> float:
+        return time.time()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"[Cache] Could not read {self.path}: {e}")
+            return
+        now = self._now()
+        for key, (value, expires_at) in data.items():
+            if expires_at > now:
+                self._entries[key] = (value, expires_at)
+
+    def _write(self, snapshot: str):
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix='.cache-', suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[Cache] Could not write {self.path}: {e}")
+
+    def _schedule_flush(self):
+        """Persist the cache within flush_interval (call with _lock held)"""
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self):
+        """Write pending changes to the cache file now"""
+        with self._write_lock:
+            with self._lock:
+                if self._flush_timer is None:
+                    return
+                self._flush_timer.cancel()
+                self._flush_timer = None
+                snapshot = json.dumps(dict(self._entries))
+            self._write(snapshot)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store value under key and schedule persisting the cache"""
+        super().set(key, value, ttl)
+        with self._lock:
+            self._schedule_flush()
+
+    def clear(self):
+        """Remove all entries and schedule persisting the empty cache"""
+        super().clear()
+        with self._lock:
+            self._schedule_flush()
+
+
+def search_cache_key(
+    query: str,
+    max_results: int,
+    order: str,
+    published_after: Optional[str],
+    video_duration: Optional[str],
+    page_token: Optional[str]
+) -> tuple:
+    """Cache key for an unfiltered search page (query is case/whitespace-normalized)"""
+    normalized_query = ' '.join(query.lower().split())
+    return (
+        normalized_query,
+        max_results,
+        order,
+        published_after if published_after != "all" else None,
+        video_duration if video_duration != "any" else None,
+        page_token or None
+    )
+
+
+# Value of StaleWhileRevalidateCache entries for keys the loader didn't find
+_NOT_FOUND = object()
+
+
+class StaleWhileRevalidateCache:
+    """
+    Keyed cache that serves stale entries while refreshing them in the background.
+
+    Entries older than `ttl` are still returned immediately; their keys are
+    queued for a background refresh in batches of `batch_size`. If a refresh
+    fails (upstream error, exhausted quota) the last known value keeps being
+    served and the refresh is retried after `retry_after` seconds. Only keys
+    that were never cached are loaded synchronously.
+
+    Keys the loader doesn't return (e.g. deleted videos) are remembered as
+    not found for `missing_ttl` seconds, so they aren't requested again on
+    every lookup; a refresh that no longer finds a key drops its value.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int,
+        batch_size: int = 50,
+        retry_after: float = 60,
+        missing_ttl: float = 60
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self.retry_after = retry_after
+        self.missing_ttl = missing_ttl
+        self._entries: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._refreshing: set = set()
+        self._tasks: set = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.not_found_hits = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def _batches(self, keys: List[Hashable]) -> List[List[Hashable]]:
+        return [keys[i:i + self.batch_size] for i in range(0, len(keys), self.batch_size)]
+
+    def _store(self, keys: List[Hashable], values: Dict[Hashable, Any]):
+        """Store the loaded values of keys; keys without a value are marked not found"""
+        now = time.monotonic()
+        fresh_until = now + self.ttl
+        for key, value in values.items():
+            self._entries[key] = [value, fresh_until]
+            self._entries.move_to_end(key)
+        for key in keys:
+            if key not in values:
+                self._entries[key] = [_NOT_FOUND, now + self.missing_ttl]
+                self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_many(self, keys: List[Hashable], loader: Callable[[List[Hashable]], Awaitable[Dict]]) -> Dict:
+        """
+        Get values for keys, loading missing ones with loader.
+
+        Args:
+            keys: Keys to look up
+            loader: Coroutine function taking up to batch_size keys and
+                returning a dict of the values it found
+
+        Returns:
+            Dict of key -> value for every key that is cached or was found
+        """
+        now = time.monotonic()
+        values = {}
+        stale = []
+        missing = []
+        for key in dict.fromkeys(keys):
+            entry = self._entries.get(key)
+            if entry is None or (entry[0] is _NOT_FOUND and entry[1] <= now):
+                missing.append(key)
+                continue
+            self._entries.move_to_end(key)
+            if entry[0] is _NOT_FOUND:
+                self.not_found_hits += 1
+                continue
+            values[key] = entry[0]
+            if entry[1] > now:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                stale.append(key)
+
+        if stale:
+            self._schedule_refresh(stale, loader)
+
+        if missing:
+            self.misses += len(missing)
+            batches = self._batches(missing)
+            for batch, loaded in zip(batches, await asyncio.gather(*(loader(batch) for batch in batches))):
+                self._store(batch, loaded)
+                values.update(loaded)
+
+        return values
+
+    def _schedule_refresh(self, keys: List[Hashable], loader: Callable[[List[Hashable]], Awaitable[Dict]]):
+        keys = [key for key in keys if key not in self._refreshing]
+        for batch in self._batches(keys):
+            self._refreshing.update(batch)
+            task = asyncio.ensure_future(self._refresh(batch, loader))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, keys: List[Hashable], loader: Callable[[List[Hashable]], Awaitable[Dict]]):
+        try:
+            # Keys the refresh no longer finds lose their stale value
+            self._store(keys, await loader(keys))
+            self.refreshes += 1
+        except Exception as e:
+            # Keep serving the last known values; retry later
+            self.refresh_errors += 1
+            print(f"[Cache] Background refresh failed: {str(e)}")
+            retry_at = time.monotonic() + self.retry_after
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry[1] = retry_at
+        finally:
+            self._refreshing.difference_update(keys)
+
+    def stats(self) -> Dict:
+        """Hit/miss and refresh counters and current size"""
+        return {
+            "size": len(self._entries),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl,
+            "hits": self.hits,
+            "staleHits": self.stale_hits,
+            "misses": self.misses,
+            "notFoundHits": self.not_found_hits,
+            "refreshes": self.refreshes,
+            "refreshErrors": self.refresh_errors,
+            "refreshing": len(self._refreshing)
+        }
@@ -0,0 +1,110 @@
+import threading
+import time
+from typing import Dict
+
+from config import settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """The upstream host's circuit is open; the call was not attempted"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one upstream host.
+
+    Trips to open after `failure_threshold` consecutive failures (transport
+    errors, timeouts, 5xx/429 responses). While open, calls fail fast with
+    CircuitOpenError. After `reset_timeout` seconds a single probe call is
+    let through (half-open): success closes the circuit again, failure
+    re-opens it for another `reset_timeout`.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.trips = 0
+        self.rejected = 0
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may be attempted now"""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                print(f"[Circuit] {self.name}: half-open, sending probe")
+                return
+            self.rejected += 1
+            raise CircuitOpenError(f"{self.name} is unavailable (circuit open)")
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                print(f"[Circuit] {self.name}: probe succeeded, closing")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.trips += 1
+                    print(f"[Circuit] {self.name}: opening after {self.consecutive_failures} failure(s)")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self):
+        """The call was abandoned (e.g. cancelled) without an outcome"""
+        with self._lock:
+            self._probing = False
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutiveFailures": self.consecutive_failures,
+                "trips": self.trips,
+                "rejected": self.rejected
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(host: str) -> CircuitBreaker:
+    """Get the circuit breaker of an upstream host, creating it on first use"""
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                host,
+                settings.circuit_breaker_failure_threshold,
+                settings.circuit_breaker_reset_seconds
+            )
+            _breakers[host] = breaker
+        return breaker
+
+
+def circuit_breaker_stats() -> Dict[str, Dict]:
+    """State and counters of every host's circuit breaker"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.stats() for breaker in breakers}
@@ -0,0 +1,102 @@
+import base64
+import hashlib
+import hmac
+import json
+import struct
+import zlib
+from typing import Iterable, List, Optional
+
+from config import get_settings
+
+# Number of most recent result IDs remembered for de-duplication
+MAX_SEEN_IDS = 500
+
+_SIGNATURE_BYTES = 12
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+def _id_hash(video_id: str) -> int:
+    return zlib.crc32(video_id.encode())
+
+
+def search_fingerprint(*parts: Optional[str]) -> str:
+    """Short fingerprint of the search a cursor belongs to"""
+    normalized = '|'.join('' if part is None else ' '.join(str(part).lower().split()) for part in parts)
+    return hashlib.sha1(normalized.encode()).hexdigest()[:8]
+
+
+class ContinuationCursor:
+    """
+    Opaque, signed continuation token for paginated searches.
+
+    Bundles the upstream cursor (YouTube pageToken / TikTok cursor), the IDs
+    of filtered results that were fetched but not yet returned, and a
+    compact set of already returned IDs so later pages never repeat them.
+    """
+
+    def __init__(
+        self,
+        platform: str,
+        search: str,
+        upstream: Optional[str] = None,
+        buffered: Optional[List[str]] = None,
+        seen: Optional[List[int]] = None
+    ):
+        self.platform = platform
+        self.search = search
+        self.upstream = upstream
+        self.buffered = buffered or []
+        self._seen = seen or []
+        self._seen_set = set(self._seen)
+
+    def is_seen(self, video_id: str) -> bool:
+        return _id_hash(video_id) in self._seen_set
+
+    def mark_seen(self, video_ids: Iterable[str]):
+        for video_id in video_ids:
+            id_hash = _id_hash(video_id)
+            if id_hash not in self._seen_set:
+                self._seen.append(id_hash)
+                self._seen_set.add(id_hash)
+
+    def encode(self) -> Optional[str]:
+        """Serialize and sign; returns None when there is nothing left to fetch"""
+        if not self.upstream and not self.buffered:
+            return None
+        seen = self._seen[-MAX_SEEN_IDS:]
+        payload = {
+            'p': self.platform,
+            'q': self.search,
+            'u': self.upstream,
+            'b': self.buffered,
+            's': _b64encode(struct.pack(f'<{len(seen)}I', *seen))
+        }
+        data = zlib.compress(json.dumps(payload, separators=(',', ':')).encode())
+        signature = hmac.new(get_settings().secret_key.encode(), data, hashlib.sha256).digest()[:_SIGNATURE_BYTES]
+        return _b64encode(signature + data)
+
+    @classmethod
+    def decode(cls, token: str, platform: str, search: str) -> 'ContinuationCursor':
+        """Verify and parse a token produced by encode()"""
+        try:
+            raw = _b64decode(token)
+            signature, data = raw[:_SIGNATURE_BYTES], raw[_SIGNATURE_BYTES:]
+            expected = hmac.new(get_settings().secret_key.encode(), data, hashlib.sha256).digest()[:_SIGNATURE_BYTES]
+            if not hmac.compare_digest(signature, expected):
+                raise ValueError("bad signature")
+            payload = json.loads(zlib.decompress(data))
+            seen_bytes = _b64decode(payload['s'])
+            seen = list(struct.unpack(f'<{len(seen_bytes) // 4}I', seen_bytes))
+        except Exception:
+            raise ValueError("Invalid page token")
+
+        if payload['p'] != platform or payload['q'] != search:
+            raise ValueError("Page token does not belong to this search")
+        return cls(platform, search, payload['u'], payload['b'], seen)
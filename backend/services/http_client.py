@@ -0,0 +1,73 @@
+import asyncio
+from typing import Dict, Optional
+
+import httpx
+
+from config import settings
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Connection pool shared by all outgoing API calls
+DEFAULT_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+DEFAULT_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30)
+
+_clients: Dict[Optional[str], httpx.AsyncClient] = {}
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _host_limits() -> httpx.Limits:
+    """Connection limits of a dedicated per-host pool"""
+    return httpx.Limits(
+        max_connections=settings.http_max_connections_per_host,
+        max_keepalive_connections=settings.http_max_connections_per_host,
+        keepalive_expiry=30
+    )
+
+
+def get_http_client(host: Optional[str] = None) -> httpx.AsyncClient:
+    """
+    Get a pooled async HTTP client, creating it on first use
+
+    Args:
+        host: Upstream host to get a dedicated client for. Dedicated clients
+            negotiate HTTP/2 when the host supports it (so concurrent requests
+            share one connection) and have their own connection limit, so a
+            slow host cannot starve the others. None returns the shared client.
+
+    Returns:
+        Client bound to the running event loop
+    """
+    global _loop
+    loop = asyncio.get_running_loop()
+    if loop is not _loop:
+        # Connections belong to the loop that opened them; start over on a new loop
+        _clients.clear()
+        _loop = loop
+
+    client = _clients.get(host)
+    if client is None or client.is_closed:
+        if host is None:
+            client = httpx.AsyncClient(timeout=DEFAULT_TIMEOUT, limits=DEFAULT_LIMITS)
+        else:
+            client = httpx.AsyncClient(
+                base_url=f"https://{host}",
+                timeout=DEFAULT_TIMEOUT,
+                limits=_host_limits(),
+                http2=HTTP2_AVAILABLE
+            )
+        _clients[host] = client
+    return client
+
+
+async def close_http_client():
+    """Close all pooled async HTTP clients (called on app shutdown)"""
+    global _loop
+    clients = list(_clients.values())
+    _clients.clear()
+    _loop = None
+    for client in clients:
+        await client.aclose()
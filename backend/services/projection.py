@@ -0,0 +1,68 @@
+from typing import Dict, Optional, Union
+
+# Fields of our video format that a projection may select; nested fields
+# are selected as 'statistics.viewCount' or 'thumbnails.medium'
+VIDEO_FIELDS: Dict[str, Optional[frozenset]] = {
+    'id': None,
+    'platform': None,
+    'title': None,
+    'description': None,
+    'channelTitle': None,
+    'publishedAt': None,
+    'tags': None,
+    'thumbnails': frozenset({'default', 'medium', 'high'}),
+    'statistics': frozenset({
+        'viewCount', 'likeCount', 'commentCount', 'shareCount', 'subscriberCount',
+        'subscriberCountEstimated', 'viewSubscriberRatio'
+    })
+}
+
+# Always included so results can be told apart, and mock data is never
+# mistaken for real numbers
+ALWAYS_INCLUDED = ('id', 'platform', 'source', 'mockReason')
+
+# Field name -> True (whole field) or set of selected nested fields
+Projection = Dict[str, Union[bool, set]]
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Projection]:
+    """
+    Parse a fields= projection such as 'title,statistics.viewCount'
+
+    Args:
+        fields: Comma-separated field names; None or empty selects everything
+
+    Returns:
+        The projection, or None for no projection
+    """
+    if not fields or not fields.strip():
+        return None
+    projection: Projection = {field: True for field in ALWAYS_INCLUDED}
+    for name in fields.split(','):
+        name = name.strip()
+        if not name:
+            continue
+        field, _, nested = name.partition('.')
+        if field not in VIDEO_FIELDS or (nested and nested not in (VIDEO_FIELDS[field] or ())):
+            raise ValueError(f"Unknown field: {name}")
+        if not nested:
+            projection[field] = True
+        elif projection.get(field) is not True:
+            projection.setdefault(field, set()).add(nested)
+    return projection
+
+
+def project(video: Dict, projection: Optional[Projection]) -> Dict:
+    """Copy of video with only the projected fields (video itself is not modified)"""
+    if projection is None:
+        return video
+    projected = {}
+    for field, selected in projection.items():
+        if field not in video:
+            continue
+        if selected is True:
+            projected[field] = video[field]
+        else:
+            value = video[field]
+            projected[field] = {key: value[key] for key in selected if key in value}
+    return projected
@@ -0,0 +1,278 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+from zoneinfo import ZoneInfo
+
+from config import settings
+
+# Documented YouTube Data API quota cost (units) of each method we call
+QUOTA_COSTS = {
+    'search.list': 100,
+    'videos.list': 1,
+    'channels.list': 1
+}
+
+# Worst-case cost of one uncached search page (search + videos + channels)
+SEARCH_PAGE_COST = QUOTA_COSTS['search.list'] + QUOTA_COSTS['videos.list'] + QUOTA_COSTS['channels.list']
+
+# YouTube quota resets at midnight Pacific time
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+
+
+class QuotaExceededError(Exception):
+    """A call would exceed the configured YouTube quota budget"""
+    pass
+
+
+class QuotaUsage:
+    """Quota units and upstream calls spent on behalf of one request"""
+
+    def __init__(self, user: Optional[str] = None):
+        self.user = user
+        self.units = 0
+        self.calls: Dict[str, int] = {}
+
+    def charge(self, method: str):
+        self.units += QUOTA_COSTS.get(method, 1)
+        self.calls[method] = self.calls.get(method, 0) + 1
+
+    def refund(self, method: str):
+        """Undo charge() for a call that was rejected without being served"""
+        self.units -= QUOTA_COSTS.get(method, 1)
+        self.calls[method] -= 1
+
+
+_request_usage: ContextVar[Optional[QuotaUsage]] = ContextVar('youtube_request_usage', default=None)
+
+
+def track_quota_usage(user: Optional[str] = None) -> QuotaUsage:
+    """Start counting quota for the current request (and tasks it spawns)"""
+    usage = QuotaUsage(user)
+    _request_usage.set(usage)
+    return usage
+
+
+def current_quota_usage() -> Optional[QuotaUsage]:
+    """Quota usage of the current request, if one is being tracked"""
+    return _request_usage.get()
+
+
+def key_id(api_key: str) -> str:
+    """Stable, non-secret identifier of an API key"""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+
+class QuotaLedger:
+    """
+    Daily YouTube quota ledger for a pool of API keys.
+
+    Every key (i.e. Google Cloud project) has its own daily budget; users
+    additionally share an optional per-user budget. Units are charged per
+    upstream call to the key with the most remaining budget, in memory,
+    and persisted to a JSON file so the count survives restarts: charges
+    are written at most every `flush_interval` seconds from a background
+    thread (and by flush() on shutdown), so upstream calls never wait for
+    the disk. Keys that YouTube reports as quotaExceeded are written at
+    once and stay out of rotation until the ledger resets on the
+    Pacific-time day boundary, like the YouTube quota itself.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        daily_limit: int,
+        user_daily_limit: Optional[int] = None,
+        flush_interval: float = 2.0
+    ):
+        self.path = Path(path)
+        self.daily_limit = daily_limit
+        self.user_daily_limit = user_daily_limit
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        # Serializes file writes, which happen outside _lock
+        self._write_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._day = self._today()
+        self._keys: Dict[str, int] = {}
+        self._exhausted: Set[str] = set()
+        self._users: Dict[str, int] = {}
+        self._load()
+
+    def _today(self) -> str:
+        return datetime.now(QUOTA_TIMEZONE).date().isoformat()
+
+    def _roll_over(self):
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self._keys = {}
+            self._exhausted = set()
+            self._users = {}
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"[Quota] Could not read ledger {self.path}: {e}")
+            return
+        if data.get('day') == self._day:
+            self._keys = {kid: int(units) for kid, units in data.get('keys', {}).items()}
+            self._exhausted = set(data.get('exhausted', []))
+            self._users = {user: int(units) for user, units in data.get('users', {}).items()}
+
+    def _snapshot(self) -> str:
+        """Serialized ledger (call with _lock held)"""
+        return json.dumps({
+            'day': self._day,
+            'keys': self._keys,
+            'exhausted': sorted(self._exhausted),
+            'users': self._users
+        })
+
+    def _write(self, snapshot: str):
+        try:
+            directory = self.path.parent
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.quota-', suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[Quota] Could not write ledger {self.path}: {e}")
+
+    def _schedule_flush(self):
+        """Write the ledger within flush_interval (call with _lock held)"""
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self):
+        """Write pending charges to the ledger file now"""
+        with self._write_lock:
+            with self._lock:
+                if self._flush_timer is None:
+                    return
+                self._flush_timer.cancel()
+                self._flush_timer = None
+                snapshot = self._snapshot()
+            self._write(snapshot)
+
+    def _remaining(self, kid: str) -> int:
+        if kid in self._exhausted:
+            return 0
+        return max(self.daily_limit - self._keys.get(kid, 0), 0)
+
+    def _pick(self, api_keys: List[str], units: int, user: Optional[str]) -> str:
+        """Key with the most remaining budget that can afford units"""
+        if user and self.user_daily_limit is not None:
+            user_used = self._users.get(user, 0)
+            if user_used + units > self.user_daily_limit:
+                raise QuotaExceededError(
+                    f"Daily YouTube quota for this user exhausted ({user_used}/{self.user_daily_limit} units used)"
+                )
+        best_key = max(api_keys, key=lambda api_key: self._remaining(key_id(api_key)), default=None)
+        if best_key is None or self._remaining(key_id(best_key)) < units:
+            used = sum(self._keys.get(key_id(api_key), 0) for api_key in api_keys)
+            raise QuotaExceededError(
+                f"Daily YouTube quota exhausted on all {len(api_keys)} API key(s) "
+                f"({used}/{self.daily_limit * len(api_keys)} units used)"
+            )
+        return best_key
+
+    def check(self, api_keys: List[str], units: int, user: Optional[str] = None):
+        """Raise QuotaExceededError if no key (or the user) can afford units"""
+        with self._lock:
+            self._roll_over()
+            self._pick(api_keys, units, user)
+
+    def acquire(self, api_keys: List[str], units: int, user: Optional[str] = None) -> str:
+        """
+        Pick the key with the most remaining budget and reserve units on it.
+
+        Raises QuotaExceededError (without charging) if no key or the user's
+        budget can afford the call, so it can be skipped. Because units are
+        reserved immediately, concurrent calls spread across the pool.
+        """
+        with self._lock:
+            self._roll_over()
+            api_key = self._pick(api_keys, units, user)
+            kid = key_id(api_key)
+            self._keys[kid] = self._keys.get(kid, 0) + units
+            if user:
+                self._users[user] = self._users.get(user, 0) + units
+            self._schedule_flush()
+            return api_key
+
+    def refund_user(self, user: Optional[str], units: int):
+        """Give back units charged to user for a call that was rejected (the key keeps its count)"""
+        if not user:
+            return
+        with self._lock:
+            self._roll_over()
+            if user in self._users:
+                self._users[user] = max(self._users[user] - units, 0)
+                self._schedule_flush()
+
+    def mark_exhausted(self, api_key: str):
+        """The API reported quotaExceeded for api_key: take it out of rotation until reset (written at once)"""
+        with self._write_lock:
+            with self._lock:
+                self._roll_over()
+                self._exhausted.add(key_id(api_key))
+                if self._flush_timer is not None:
+                    # Pending charges go out with this write
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                snapshot = self._snapshot()
+            self._write(snapshot)
+
+    def status(self, api_keys: List[str], user: Optional[str] = None) -> Dict:
+        """Used and remaining units for today: in total, per key and for user"""
+        with self._lock:
+            self._roll_over()
+            now = datetime.now(QUOTA_TIMEZONE)
+            resets_at = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), QUOTA_TIMEZONE)
+            keys = [
+                {
+                    "id": key_id(api_key),
+                    "used": self._keys.get(key_id(api_key), 0),
+                    "remaining": self._remaining(key_id(api_key)),
+                    "exhausted": key_id(api_key) in self._exhausted
+                }
+                for api_key in api_keys
+            ]
+            result = {
+                "day": self._day,
+                "resetsAt": resets_at.isoformat(),
+                "limit": self.daily_limit * len(api_keys),
+                "used": sum(key["used"] for key in keys),
+                "remaining": sum(key["remaining"] for key in keys),
+                "keys": keys
+            }
+            if user:
+                user_used = self._users.get(user, 0)
+                result["user"] = {
+                    "limit": self.user_daily_limit,
+                    "used": user_used,
+                    "remaining": (
+                        max(self.user_daily_limit - user_used, 0)
+                        if self.user_daily_limit is not None else None
+                    )
+                }
+            return result
+
+quota_ledger = QuotaLedger(
+    settings.youtube_quota_ledger_path,
+    settings.youtube_daily_quota,
+    settings.youtube_user_daily_quota,
+    settings.youtube_quota_ledger_flush_seconds
+)
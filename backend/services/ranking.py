@@ -0,0 +1,81 @@
+import heapq
+from datetime import datetime
+from typing import Any, Callable, Dict, Generic, List, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+def _published_timestamp(video: Dict) -> float:
+    try:
+        return datetime.fromisoformat(video['publishedAt'].replace('Z', '+00:00')).timestamp()
+    except (KeyError, ValueError, AttributeError):
+        return 0.0
+
+
+def _view_subscriber_ratio(video: Dict) -> float:
+    stats = video['statistics']
+    # Estimated follower counts (TikTok) would give every such video the
+    # same made-up ratio, so like the ratio filter they don't count
+    if not stats['subscriberCount'] or stats.get('subscriberCountEstimated'):
+        return 0.0
+    return stats['viewCount'] / stats['subscriberCount']
+
+
+def _engagement_rate(video: Dict) -> float:
+    stats = video['statistics']
+    if not stats['viewCount']:
+        return 0.0
+    return (stats['likeCount'] + stats['commentCount']) / stats['viewCount']
+
+
+# Ranking keys for search results (higher ranks first). 'ratio' and
+# 'engagement' are computed from the raw counts, not the rounded
+# viewSubscriberRatio, so close scores keep their order.
+SORT_KEYS: Dict[str, Callable[[Dict], Any]] = {
+    'views': lambda video: video['statistics']['viewCount'],
+    'likes': lambda video: video['statistics']['likeCount'],
+    'comments': lambda video: video['statistics']['commentCount'],
+    'recency': _published_timestamp,
+    'ratio': _view_subscriber_ratio,
+    'engagement': _engagement_rate
+}
+
+
+def get_sort_key(sort_by: str) -> Callable[[Dict], Any]:
+    """Look up a ranking key by name (ValueError for unknown names)"""
+    try:
+        return SORT_KEYS[sort_by]
+    except KeyError:
+        raise ValueError(f"sortBy must be one of: {', '.join(SORT_KEYS)}")
+
+
+class TopK(Generic[T]):
+    """
+    Keeps the k highest-ranked items pushed so far.
+
+    Backed by a min-heap of at most k entries whose root is the weakest item
+    kept, so each push costs O(log k) and memory stays O(k) however many
+    items are scanned. Among equal scores the earlier item wins, matching a
+    stable sort.
+    """
+
+    def __init__(self, k: int, key: Callable[[T], Any]):
+        self.k = k
+        self.key = key
+        self.pushed = 0
+        self._heap: List[Tuple[Any, int, T]] = []
+
+    def push(self, item: T):
+        self.pushed += 1
+        entry = (self.key(item), -self.pushed, item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def items(self) -> List[T]:
+        """Kept items, best first"""
+        return [item for _, _, item in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
@@ -0,0 +1,255 @@
+import asyncio
+import base64
+import json
+import time
+from typing import Dict, List, Optional
+
+from config import settings
+from services.circuit_breaker import CircuitOpenError
+from services.projection import parse_fields, project
+from services.quota import QuotaExceededError
+from services.ranking import get_sort_key
+from services.tiktok_service import tiktok_service
+from services.youtube_service import youtube_service
+
+PLATFORMS = ('youtube', 'tiktok')
+
+
+def parse_platforms(platforms: str) -> List[str]:
+    """Parse a comma-separated platform list (order and duplicates don't matter)"""
+    requested = {p.strip().lower() for p in platforms.split(',') if p.strip()}
+    unknown = requested - set(PLATFORMS)
+    if unknown:
+        raise ValueError(f"Unknown platform(s): {', '.join(sorted(unknown))}")
+    if not requested:
+        raise ValueError("No platform given")
+    return [p for p in PLATFORMS if p in requested]
+
+
+def encode_page_token(tokens: Dict[str, Optional[str]]) -> Optional[str]:
+    """
+    Bundle the per-platform continuation tokens of the platforms that have
+    more results (None: start at the first page); None when there are none
+    """
+    if not tokens:
+        return None
+    data = json.dumps(tokens, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def decode_page_token(token: str) -> Dict[str, Optional[str]]:
+    """Parse a token produced by encode_page_token (the platform tokens verify themselves)"""
+    try:
+        tokens = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        if not isinstance(tokens, dict) or not all(
+            platform in PLATFORMS and (value is None or isinstance(value, str)) for platform, value in tokens.items()
+        ):
+            raise ValueError("unexpected content")
+    except Exception:
+        raise ValueError("Invalid page token")
+    return tokens
+
+
+class UnifiedSearchService:
+    """
+    Searches several platforms at once and merges the results.
+
+    Platforms are queried concurrently, each under the same deadline: a
+    platform that hasn't answered by then is reported as timed out and the
+    response is built from the others, so latency is set by the faster
+    backend instead of the sum of both.
+    """
+
+    def _to_unified(self, platform: str, video: Dict, source: str) -> Dict:
+        """Map a platform search result to the unified video format"""
+        stats = video['statistics']
+        return {
+            'id': video['id'],
+            'platform': platform,
+            'source': video.get('source', source),
+            'title': video['title'],
+            'description': video['description'],
+            'channelTitle': video['channelTitle'],
+            'publishedAt': video['publishedAt'],
+            'thumbnails': video['thumbnails'],
+            'tags': video.get('tags', []),
+            'statistics': {
+                'viewCount': stats['viewCount'],
+                'likeCount': stats['likeCount'],
+                'commentCount': stats['commentCount'],
+                'shareCount': stats.get('shareCount'),
+                'subscriberCount': stats['subscriberCount'],
+                'subscriberCountEstimated': stats.get('subscriberCountEstimated', False),
+                'viewSubscriberRatio': stats['viewSubscriberRatio']
+            }
+        }
+
+    def _search_platform(
+        self,
+        platform: str,
+        query: str,
+        max_results: int,
+        order: str,
+        published_after: Optional[str],
+        video_duration: Optional[str],
+        min_ratio: Optional[float],
+        min_comments: Optional[int],
+        tag: Optional[str],
+        page_token: Optional[str],
+        user: Optional[str]
+    ):
+        params = dict(
+            query=query,
+            max_results=max_results,
+            order=order,
+            published_after=published_after,
+            video_duration=video_duration,
+            min_ratio=min_ratio,
+            min_comments=min_comments,
+            tag=tag,
+            page_token=page_token
+        )
+        if platform == 'youtube':
+            return youtube_service.search_videos(**params, user=user)
+        return tiktok_service.search_videos(**params)
+
+    def _status(self, task: asyncio.Future, elapsed_ms: float) -> Dict:
+        """Per-platform status of a finished search task"""
+        error = task.exception()
+        if error is None:
+            result = task.result()
+            # Mock data is never ranked next to real results; a platform
+            # that returned nothing within its own time budget timed out
+            if result.get('source') == "mock":
+                state = "mock"
+            elif result.get('partial') and not result['total']:
+                state = "timeout"
+            else:
+                state = "ok"
+            status = {"status": state, "total": result['total'], "elapsedMs": elapsed_ms}
+            if result.get('partial'):
+                status["partial"] = True
+            if 'source' in result:
+                status["source"] = result['source']
+            if 'mockReason' in result:
+                status["mockReason"] = result['mockReason']
+            if 'quotaUsed' in result:
+                status["quotaUsed"] = result['quotaUsed']
+            return status
+        if isinstance(error, QuotaExceededError):
+            state = "quota_exceeded"
+        elif isinstance(error, CircuitOpenError):
+            state = "unavailable"
+        else:
+            state = "error"
+        return {"status": state, "error": str(error), "elapsedMs": elapsed_ms}
+
+    async def search(
+        self,
+        query: str,
+        platforms: List[str],
+        max_results: int = 25,
+        sort_by: str = "ratio",
+        order: str = "relevance",
+        published_after: Optional[str] = None,
+        video_duration: Optional[str] = None,
+        min_ratio: Optional[float] = None,
+        min_comments: Optional[int] = None,
+        tag: Optional[str] = None,
+        page_token: Optional[str] = None,
+        timeout_ms: Optional[int] = None,
+        user: Optional[str] = None,
+        fields: Optional[str] = None
+    ) -> Dict:
+        """
+        Search several platforms concurrently and merge the results
+
+        Every platform returns up to max_results videos (filters apply per
+        platform); the merged list is ranked by sort_by. A platform that
+        misses the deadline, fails or only has mock data doesn't fail the
+        request: its results are left out, its status says why, and its
+        position is kept in nextPageToken so the next page retries it.
+        Slow searches keep running in the background and fill the
+        platform's search cache, so a retry is usually fast. Videos whose
+        subscriber count is only an estimate rank last by ratio.
+
+        Args:
+            query: Search query string
+            platforms: Platforms to search (see PLATFORMS)
+            max_results: Maximum number of results per platform
+            sort_by: Ranking key of the merged list (see ranking.SORT_KEYS)
+            page_token: nextPageToken of a previous response
+            timeout_ms: Deadline per platform (default UNIFIED_SEARCH_TIMEOUT_MS)
+            user: Caller identity for per-user quota budgets
+            fields: Projection of the returned videos (see projection.parse_fields)
+
+        Returns:
+            Dictionary with the merged videos and a status per platform
+        """
+        sort_key = get_sort_key(sort_by)
+        projection = parse_fields(fields)
+        tokens = decode_page_token(page_token) if page_token else {}
+        timeout = (timeout_ms or settings.unified_search_timeout_ms) / 1000
+
+        statuses = {}
+        tasks = {}
+        for platform in platforms:
+            if page_token and platform not in tokens:
+                # No position left in the cursor: nothing more to fetch
+                statuses[platform] = {"status": "exhausted", "total": 0}
+                continue
+            tasks[platform] = asyncio.ensure_future(self._search_platform(
+                platform, query, max_results, order, published_after, video_duration,
+                min_ratio, min_comments, tag, tokens.get(platform), user
+            ))
+
+        started = time.monotonic()
+        finished_at = {}
+        for platform, task in tasks.items():
+            task.add_done_callback(lambda _, p=platform: finished_at.setdefault(p, time.monotonic()))
+        if tasks:
+            await asyncio.wait(tasks.values(), timeout=timeout)
+
+        for task in tasks.values():
+            if task.done() and isinstance(task.exception(), ValueError):
+                # Invalid parameters or page token: the whole request is invalid
+                for other in tasks.values():
+                    other.cancel()
+                raise task.exception()
+
+        videos = []
+        next_tokens = {}
+        for platform, task in tasks.items():
+            if not task.done():
+                task.cancel()
+                statuses[platform] = {"status": "timeout", "elapsedMs": round(timeout * 1000, 1)}
+                next_tokens[platform] = tokens.get(platform)
+                continue
+            elapsed_ms = round((finished_at[platform] - started) * 1000, 1)
+            statuses[platform] = self._status(task, elapsed_ms)
+            if statuses[platform]["status"] != "ok":
+                # Retried from the same position next page (a mock result's
+                # token isn't a real continuation cursor)
+                next_tokens[platform] = tokens.get(platform)
+                continue
+            result = task.result()
+            source = result.get('source') or ("cached" if result.get('cached') else "live")
+            videos.extend(self._to_unified(platform, video, source) for video in result['videos'])
+            if result['nextPageToken']:
+                next_tokens[platform] = result['nextPageToken']
+
+        videos.sort(key=sort_key, reverse=True)
+        return {
+            "videos": [project(video, projection) for video in videos],
+            "total": len(videos),
+            "query": query,
+            "sortBy": sort_by,
+            "platforms": statuses,
+            "nextPageToken": encode_page_token(next_tokens),
+            "partial": any(
+                status["status"] not in ("ok", "exhausted") or status.get("partial")
+                for status in statuses.values()
+            )
+        }
+
+unified_search_service = UnifiedSearchService()
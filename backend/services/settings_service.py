@@ -1,6 +1,12 @@
-from config import Settings
+from config import Settings, settings_lock
+from services.quota import key_id
+from services.youtube_client import youtube_client_manager
 from typing import Dict
 
+def _mask_key(api_key: str) -> str:
+    """Show only the start and end of an API key"""
+    return f"{api_key[:8]}...{api_key[-4:]}" if len(api_key) > 12 else "***"
+
 class SettingsService:
     @staticmethod
     def get_api_key_status() -> Dict:
@@ -8,10 +14,9 @@ class SettingsService:
         api_key = Settings.get_api_key()
         if api_key:
             # Return masked key for security
-            masked_key = f"{api_key[:8]}...{api_key[-4:]}" if len(api_key) > 12 else "***"
             return {
                 "configured": True,
-                "maskedKey": masked_key
+                "maskedKey": _mask_key(api_key)
             }
         return {
             "configured": False,
@@ -43,16 +48,79 @@ class SettingsService:
             }
         raise Exception("Failed to delete API key")
     
+    @staticmethod
+    def get_api_key_pool_status() -> Dict:
+        """List the YouTube API key pool with today's per-key quota usage"""
+        api_keys = Settings.get_api_keys()
+        usage = {key["id"]: key for key in youtube_client_manager.quota_status()["keys"]}
+        return {
+            "keys": [
+                {
+                    **usage[key_id(api_key)],
+                    "maskedKey": _mask_key(api_key),
+                    "primary": index == 0 and api_key == Settings.get_api_key()
+                }
+                for index, api_key in enumerate(api_keys)
+            ]
+        }
+    
+    @staticmethod
+    def add_pool_api_key(api_key: str) -> Dict:
+        """Add a YouTube API key to the pool"""
+        if not api_key or len(api_key) < 10:
+            raise ValueError("Invalid API key format")
+        
+        with settings_lock:
+            api_keys = Settings.get_api_keys()
+            if api_key in api_keys:
+                raise ValueError("API key is already in the pool")
+            
+            if not api_keys:
+                success = Settings.save_api_key(api_key)
+            else:
+                primary = Settings.get_api_key()
+                success = Settings.save_api_keys(primary, [k for k in api_keys if k != primary] + [api_key])
+        if success:
+            return {
+                "success": True,
+                "id": key_id(api_key),
+                "message": "API key added to pool"
+            }
+        raise Exception("Failed to save API key")
+    
+    @staticmethod
+    def delete_pool_api_key(pool_key_id: str) -> Dict:
+        """Remove a YouTube API key from the pool by its id"""
+        with settings_lock:
+            api_keys = Settings.get_api_keys()
+            matches = [k for k in api_keys if key_id(k) == pool_key_id]
+            if not matches:
+                raise KeyError("API key not found")
+            
+            api_key = matches[0]
+            primary = Settings.get_api_key()
+            remaining = [k for k in api_keys if k != primary and k != api_key]
+            if api_key == primary:
+                # Promote the next pooled key to primary (if any)
+                success = Settings.save_api_keys(remaining[0] if remaining else None, remaining[1:])
+            else:
+                success = Settings.save_api_keys(primary, remaining)
+        if success:
+            return {
+                "success": True,
+                "message": "API key removed from pool"
+            }
+        raise Exception("Failed to delete API key")
+    
     @staticmethod
     def get_tiktok_api_key_status() -> Dict:
         """Check if TikTok API key is configured"""
         api_key = Settings.get_tiktok_api_key()
         if api_key:
             # Return masked key for security
-            masked_key = f"{api_key[:8]}...{api_key[-4:]}" if len(api_key) > 12 else "***"
             return {
                 "configured": True,
-                "maskedKey": masked_key
+                "maskedKey": _mask_key(api_key)
             }
         return {
             "configured": False,
@@ -0,0 +1,55 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """
+    De-duplicates concurrent identical calls.
+
+    The first caller for a key starts the call; callers arriving while it
+    is in flight await the same execution and share its result (or error).
+    The call runs as its own task, so a caller that goes away doesn't cancel
+    it for the others. Nothing is kept once the call completes.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run fn() once for all concurrent callers with the same key
+
+        Args:
+            key: Identity of the call; equal keys must mean equal results
+            fn: Coroutine function performing the call
+
+        Returns:
+            The result and whether it was shared from another caller's execution
+        """
+        task = self._calls.get(key)
+        shared = task is not None
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task), shared
+
+    def _finish(self, key: Hashable, task: asyncio.Future):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the error as retrieved even if every caller went away
+            task.exception()
+
+    def stats(self) -> Dict:
+        """Execution and coalescing counters"""
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "inFlight": len(self._calls)
+        }
@@ -0,0 +1,54 @@
+import json
+from typing import AsyncIterator, Dict, Tuple
+
+# Supported stream formats and their media types
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream'
+}
+
+
+def format_event(event: str, data: Dict, fmt: str) -> str:
+    """Serialize one event as an NDJSON line or a Server-Sent Event"""
+    payload = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+    if fmt == 'sse':
+        return f"event: {event}\ndata: {payload}\n\n"
+    return f'{{"event":"{event}","data":{payload}}}\n'
+
+
+async def open_stream(events: AsyncIterator[Tuple[str, Dict]], fmt: str) -> AsyncIterator[str]:
+    """
+    Start an event stream and return its serialized body
+    
+    Waits for the first event, so errors that happen before anything is
+    sent (invalid parameters, exhausted quota, ...) are raised here and can
+    still become an HTTP error status. Errors after that end the stream
+    with an 'error' event.
+    
+    Args:
+        events: (event, data) pairs, e.g. from a service's stream_search
+        fmt: 'ndjson' or 'sse'
+    
+    Returns:
+        Async iterator of serialized events
+    """
+    if fmt not in MEDIA_TYPES:
+        await events.aclose()
+        raise ValueError(f"format must be one of: {', '.join(MEDIA_TYPES)}")
+    try:
+        first = await events.__anext__()
+    except BaseException:
+        await events.aclose()
+        raise
+    
+    async def body() -> AsyncIterator[str]:
+        try:
+            yield format_event(*first, fmt)
+            async for event, data in events:
+                yield format_event(event, data, fmt)
+        except Exception as e:
+            yield format_event('error', {'detail': str(e)}, fmt)
+        finally:
+            await events.aclose()
+    
+    return body()
@@ -0,0 +1,192 @@
+import random
+import re
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Candidate locations of every field we read, in priority order. Scraper
+# responses put fields at the top level; other TikTok APIs nest counts
+# under 'statistics' and media under 'video'.
+FIELD_PATHS: Dict[str, Tuple[Tuple[str, ...], ...]] = {
+    'view_count': (('play_count',), ('playCount',), ('statistics', 'playCount'), ('statistics', 'play_count')),
+    'like_count': (('digg_count',), ('diggCount',), ('statistics', 'diggCount'), ('statistics', 'digg_count')),
+    'comment_count': (
+        ('comment_count',), ('commentCount',), ('statistics', 'commentCount'), ('statistics', 'comment_count')
+    ),
+    'share_count': (('share_count',), ('shareCount',), ('statistics', 'shareCount'), ('statistics', 'share_count')),
+    'subscriber_count': (('author', 'follower_count'), ('author', 'followerCount'), ('author', 'fans')),
+    # Prioritize numeric video_id for embed compatibility
+    'video_id': (('video_id',), ('aweme_id',), ('id',)),
+    'cover_url': (
+        ('cover',), ('ai_dynamic_cover',), ('dynamic_cover',), ('origin_cover',),
+        ('video', 'cover'), ('video', 'dynamicCover'), ('video', 'originCover')
+    ),
+    'desc': (('title',), ('desc',), ('description',), ('text',)),
+    'create_time': (('create_time',), ('createTime',), ('createtime',)),
+    'author_name': (('author', 'nickname'), ('author', 'unique_id'), ('author', 'uniqueId')),
+    'tags': (('hashtags',), ('challenges',))
+}
+
+FIELD_DEFAULTS: Dict[str, Any] = {
+    'view_count': 0,
+    'like_count': 0,
+    'comment_count': 0,
+    'share_count': 0,
+    'subscriber_count': 0,
+    'video_id': None,
+    'cover_url': 'https://placehold.co/480x360?text=TikTok',
+    'desc': '',
+    'create_time': 0,
+    'author_name': 'Unknown',
+    'tags': None
+}
+
+HASHTAG_PATTERN = re.compile(r'#(\w+)')
+MAX_EXTRACTED_TAGS = 5
+
+_EMPTY: Dict = {}
+
+
+def _lookup(path: Tuple[str, ...], hoisted: Tuple[str, ...] = ()) -> str:
+    """Source expression reading path from `item` (containers in hoisted are locals)"""
+    if len(path) == 1:
+        return f"item.get({path[0]!r})"
+    outer, key = path
+    if outer in hoisted:
+        return f"_{outer}.get({key!r})"
+    return f"(item.get({outer!r}) or _EMPTY).get({key!r})"
+
+
+def _has_path(item: Dict, path: Tuple[str, ...]) -> bool:
+    value: Any = item
+    for key in path:
+        if not isinstance(value, dict) or value.get(key) is None:
+            return False
+        value = value[key]
+    return True
+
+
+def detect_schema(item: Dict) -> Tuple[Optional[Tuple[str, ...]], ...]:
+    """
+    Work out which field layout an item uses.
+
+    Returns, for every field in FIELD_PATHS, the first candidate path
+    present in item (None if the field is absent).
+    """
+    return tuple(
+        next((path for path in paths if _has_path(item, path)), None)
+        for paths in FIELD_PATHS.values()
+    )
+
+
+def compile_extractor(schema: Tuple[Optional[Tuple[str, ...]], ...]) -> Callable[[Dict], Tuple]:
+    """
+    Build an extractor specialised for one response layout.
+
+    The generated function reads every field from its detected path first,
+    so on items matching the layout each field costs a single lookup; only
+    a missing or empty value falls through to the remaining candidates (in
+    their usual priority order), so items deviating from the sample still
+    resolve like before. Returns the field values in FIELD_PATHS order.
+    """
+    hoisted = tuple(sorted({path[0] for path in schema if path and len(path) == 2}))
+    lines = ["def extract(item):"]
+    lines += [f"    _{outer} = item.get({outer!r}) or _EMPTY" for outer in hoisted]
+    for (field, paths), detected in zip(FIELD_PATHS.items(), schema):
+        ordered = ([detected] if detected else []) + [path for path in paths if path != detected]
+        chain = " or ".join(_lookup(path, hoisted) for path in ordered)
+        lines.append(f"    {field} = {chain} or _DEFAULTS[{field!r}]")
+    lines.append(f"    return ({', '.join(FIELD_PATHS)},)")
+
+    namespace = {'_EMPTY': _EMPTY, '_DEFAULTS': FIELD_DEFAULTS}
+    exec(compile("\n".join(lines), f"<tiktok extractor {hash(schema)}>", "exec"), namespace)
+    return namespace['extract']
+
+
+class TikTokNormalizer:
+    """
+    Maps raw TikTok API items to our video format.
+
+    The layout of a batch is detected from its first item and the matching
+    compiled extractor is applied to every item (extractors are cached per
+    layout, so each is compiled once per process).
+    """
+
+    def __init__(self):
+        self._extractors: Dict[Tuple, Callable[[Dict], Tuple]] = {}
+
+    def _extractor_for(self, item: Dict) -> Callable[[Dict], Tuple]:
+        schema = detect_schema(item)
+        extractor = self._extractors.get(schema)
+        if extractor is None:
+            extractor = compile_extractor(schema)
+            self._extractors[schema] = extractor
+        return extractor
+
+    def normalize(self, items: List[Dict]) -> List[Dict]:
+        """Normalize a batch of items (unfiltered); malformed items are skipped"""
+        if not items:
+            return []
+        extract = self._extractor_for(items[0])
+        videos = []
+        for item in items:
+            try:
+                videos.append(self._format(extract(item)))
+            except Exception as e:
+                print(f"[TikTok API] Error processing video item: {str(e)}")
+        return videos
+
+    def _format(self, values: Tuple) -> Dict:
+        # Same order as FIELD_PATHS
+        (
+            view_count, like_count, comment_count, share_count, subscriber_count,
+            video_id, cover_url, desc, create_time, author_name, tags
+        ) = values
+        video_id = video_id or str(random.randint(100000, 999999))
+
+        if create_time:
+            published_at = datetime.fromtimestamp(create_time).isoformat() + "Z"
+        else:
+            published_at = datetime.utcnow().isoformat() + "Z"
+
+        # Extract hashtags from description if not provided
+        tags = tags or []
+        if not tags and '#' in desc:
+            tags = HASHTAG_PATTERN.findall(desc)[:MAX_EXTRACTED_TAGS]
+
+        # Estimate follower count if not available
+        # Use engagement rate to estimate: typical TikTok engagement is 5-10%
+        subscriber_count_estimated = False
+        if subscriber_count == 0 and view_count > 0:
+            # Estimate based on engagement (assuming 8% engagement rate)
+            subscriber_count = int(view_count / 8)  # Conservative estimate
+            subscriber_count_estimated = True
+
+        # Calculate ratio with estimated or real follower count
+        ratio = 0
+        if subscriber_count > 0:
+            ratio = (view_count / subscriber_count) * 100
+
+        return {
+            'id': str(video_id),
+            'title': desc[:100] if desc else f'TikTok Video {video_id}',
+            'description': desc,
+            'channelTitle': author_name,
+            'publishedAt': published_at,
+            'thumbnails': {
+                'default': {'url': cover_url, 'width': 120, 'height': 90},
+                'medium': {'url': cover_url, 'width': 320, 'height': 180},
+                'high': {'url': cover_url, 'width': 480, 'height': 360}
+            },
+            'tags': tags,
+            'statistics': {
+                'viewCount': view_count,
+                'likeCount': like_count,
+                'commentCount': comment_count,
+                'shareCount': share_count,
+                'subscriberCount': subscriber_count,
+                'subscriberCountEstimated': subscriber_count_estimated,
+                'viewSubscriberRatio': round(ratio, 2)
+            }
+        }
+
+tiktok_normalizer = TikTokNormalizer()
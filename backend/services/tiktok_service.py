@@ -1,15 +1,53 @@
-from typing import List, Dict, Optional
+import asyncio
+import time
+from itertools import zip_longest
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 import random
-import re
-import requests
+import httpx
 from datetime import datetime, timedelta
-from config import Settings
+from config import Settings, get_settings, settings
+from services.cache import PersistentTTLCache, TTLCache, search_cache_key
+from services.circuit_breaker import CircuitOpenError, get_circuit_breaker
+from services.cursor import ContinuationCursor, search_fingerprint
+from services.http_client import get_http_client
+from services.projection import parse_fields, project
+from services.single_flight import SingleFlight
+from services.tiktok_normalizer import tiktok_normalizer
+
+# Maximum number of matching challenges a search can fan out over
+MAX_CHALLENGES = 5
+
+# Upstream cursor of a search whose challenge lookup missed the time
+# budget: the next page starts over once the lookup is cached
+LOOKUP_PENDING = '*'
+
+# Videos per RapidAPI page; larger max_results fetch several pages
+MAX_PAGE_SIZE = 50
+# Largest max_results of a search (large-result mode)
+MAX_LARGE_RESULTS = 1000
+
+# Maximum number of video IDs accepted by get_videos_batch (one API request each)
+MAX_BATCH_IDS = 100
 
 class TikTokService:
     def __init__(self):
-        pass
+        self.page_cache = TTLCache(settings.search_cache_ttl_seconds, settings.search_cache_max_entries)
+        # Normalized videos by ID, used to serve buffered results and details
+        self.video_cache = TTLCache(settings.search_cache_ttl_seconds, settings.video_cache_max_entries)
+        # Keyword -> challenge ID, shared across restarts
+        self.challenge_cache = PersistentTTLCache(
+            settings.tiktok_challenge_cache_path,
+            settings.tiktok_challenge_cache_ttl_seconds,
+            settings.tiktok_challenge_cache_max_entries
+        )
+        # Identical in-flight searches / video-info lookups share one execution
+        self.search_flight = SingleFlight()
+        self.detail_flight = SingleFlight()
+        # Challenge lookups run to completion (and fill the cache) even
+        # when the search that started them stops waiting
+        self.challenge_flight = SingleFlight()
     
-    def search_videos(
+    async def search_videos(
         self,
         query: str,
         max_results: int = 25,
@@ -19,23 +57,256 @@ class TikTokService:
         min_ratio: Optional[float] = None,
         min_comments: Optional[int] = None,
         tag: Optional[str] = None,
-        page_token: Optional[str] = None
+        page_token: Optional[str] = None,
+        challenges: int = 1,
+        time_budget_ms: Optional[int] = None,
+        fields: Optional[str] = None
     ) -> Dict:
         """
         Search for TikTok videos. Uses RapidAPI if key is configured, otherwise Mock.
+        
+        With challenges > 1 the search fans out over that many of the best
+        matching challenges (e.g. #dance, #dancechallenge, #dancetok) and
+        merges their posts. The fan-out returns whatever arrived within
+        time_budget_ms (default TIKTOK_FANOUT_TIME_BUDGET_MS).
+        
+        Unfiltered RapidAPI pages are cached, so repeating a search or changing
+        only the post-filters does not re-hit the API.
+        
+        The returned nextPageToken is an opaque continuation cursor carrying
+        the API cursor, results that didn't fit in this response and the IDs
+        already returned, so pages never repeat a video.
+        
+        `source` tells where the videos came from: "live" (fetched from the
+        API for this request), "cached" (served from the search cache) or
+        "mock" (generated placeholder data, with `mockReason`), so mock
+        numbers are never mistaken for real analytics.
+        
+        max_results above one RapidAPI page (50) fetch consecutive pages
+        until enough videos pass the filters, within LARGE_RESULT_MAX_PAGES
+        pages and time_budget_ms (default LARGE_RESULT_TIME_BUDGET_MS) for
+        the whole search.
+        
+        Identical searches arriving while one is in flight share its
+        execution and result (marked `coalesced`).
+        
+        fields projects the returned videos (see projection.parse_fields).
+        """
+        projection = parse_fields(fields)
+        key = (
+            query, max_results, order, published_after, video_duration, min_ratio,
+            min_comments, tag, page_token, challenges, time_budget_ms
+        )
+        result, shared = await self.search_flight.do(key, lambda: self._search_videos(
+            query, max_results, order, published_after, video_duration, min_ratio,
+            min_comments, tag, page_token, challenges, time_budget_ms
+        ))
+        if projection is not None:
+            result = dict(result, videos=[project(video, projection) for video in result['videos']])
+        return dict(result, coalesced=shared)
+    
+    async def stream_search(
+        self,
+        query: str,
+        max_results: int = 25,
+        order: str = "relevance",
+        published_after: Optional[str] = None,
+        video_duration: Optional[str] = None,
+        min_ratio: Optional[float] = None,
+        min_comments: Optional[int] = None,
+        tag: Optional[str] = None,
+        page_token: Optional[str] = None,
+        challenges: int = 1,
+        time_budget_ms: Optional[int] = None,
+        fields: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Search, yielding results as soon as they are available
+        
+        Takes the same arguments as search_videos and produces the same
+        events as YouTubeService.stream_search: ('video', video) for every
+        result as soon as its page arrives and it passes the filters, then
+        one ('summary', ...) with the other search_videos response fields.
+        Results are not kept, so memory doesn't grow with the result count.
+        Streams are not coalesced.
         """
+        projection = parse_fields(fields)
         api_key = Settings.get_tiktok_api_key()
+        if not 1 <= challenges <= MAX_CHALLENGES:
+            raise ValueError(f"challenges must be between 1 and {MAX_CHALLENGES}")
+        if not 1 <= max_results <= MAX_LARGE_RESULTS:
+            raise ValueError(f"maxResults must be between 1 and {MAX_LARGE_RESULTS}")
+        
+        # Beyond one page, keep fetching pages within the large-result budgets;
+        # time_budget_ms then bounds the whole search
+        page_size = min(max_results, MAX_PAGE_SIZE)
+        if max_results > MAX_PAGE_SIZE:
+            max_pages = settings.large_result_max_pages
+            deadline = time.monotonic() + (time_budget_ms or settings.large_result_time_budget_ms) / 1000
+            fanout_budget_ms = settings.tiktok_fanout_time_budget_ms if challenges > 1 else None
+        else:
+            max_pages = 1
+            deadline = None
+            fanout_budget_ms = time_budget_ms
+            if fanout_budget_ms is None and challenges > 1:
+                fanout_budget_ms = settings.tiktok_fanout_time_budget_ms
         
         if api_key:
-            return self._search_rapidapi(
-                api_key, query, max_results, order, published_after, 
-                video_duration, min_ratio, min_comments, tag, page_token
-            )
+            search = search_fingerprint(query, order, str(challenges))
+            if page_token:
+                cursor = ContinuationCursor.decode(page_token, 'tiktok', search)
+            else:
+                cursor = ContinuationCursor('tiktok', search)
+            
+            if cursor.upstream == LOOKUP_PENDING:
+                # The challenge lookup didn't finish last time: start over
+                cursor.upstream = None
+                page_token = None
+            
+            emitted = 0
+            overflow = []
+            cached = True
+            failed = False
+            partial = False
+            pages_fetched = 0
+            
+            # Results left over from the previous page come first
+            buffered = [self.video_cache.get(video_id) for video_id in cursor.buffered]
+            for video in self._apply_filters([v for v in buffered if v is not None], min_ratio, min_comments):
+                if emitted < max_results:
+                    emitted += 1
+                    yield 'video', project(video, projection)
+                else:
+                    overflow.append(video['id'])
+            
+            # A first request starts at cursor 0; a cursor without an API
+            # cursor means the search is exhausted
+            more = not page_token or bool(cursor.upstream)
+            while (
+                more and emitted < max_results and pages_fetched < max_pages
+                and (deadline is None or time.monotonic() < deadline)
+            ):
+                cache_key = search_cache_key(query, page_size, order, published_after, video_duration, cursor.upstream)
+                cache_key += (challenges,)
+                page = self.page_cache.get(cache_key)
+                
+                if page is None:
+                    cached = False
+                    budget_ms = fanout_budget_ms
+                    if deadline is not None:
+                        # A page never runs past the large-result deadline
+                        remaining_ms = max(int((deadline - time.monotonic()) * 1000), 1)
+                        budget_ms = min(budget_ms or remaining_ms, remaining_ms)
+                    page = await self._search_rapidapi(
+                        api_key, query, page_size, order, published_after,
+                        video_duration, cursor.upstream, challenges, budget_ms
+                    )
+                    if page is not None:
+                        # Pages cut short by the time budget are not cached
+                        if page['complete']:
+                            self.page_cache.set(cache_key, page)
+                        for video in page['videos']:
+                            self.video_cache.set(video['id'], video)
+                
+                if page is None:
+                    failed = True
+                    break
+                pages_fetched += 1
+                partial = partial or not page['complete']
+                cursor.upstream = page['nextPageToken']
+                # A pending challenge lookup is retried by the next request
+                more = bool(cursor.upstream) and cursor.upstream != LOOKUP_PENDING
+                fresh = [
+                    video for video in self._apply_filters(page['videos'], min_ratio, min_comments)
+                    if not cursor.is_seen(video['id'])
+                ]
+                cursor.mark_seen(video['id'] for video in fresh)
+                for video in fresh:
+                    if emitted < max_results:
+                        emitted += 1
+                        yield 'video', project(video, projection)
+                    else:
+                        overflow.append(video['id'])
+            
+            if not (failed and not emitted):
+                cursor.buffered = overflow
+                summary = {
+                    "total": emitted,
+                    "query": query,
+                    "order": order,
+                    "nextPageToken": cursor.encode(),
+                    "cached": cached,
+                    "pagesFetched": pages_fetched,
+                    "source": "cached" if cached else "live"
+                }
+                if partial:
+                    # Some challenges missed the time budget; the cursor retries them
+                    summary["partial"] = True
+                yield 'summary', summary
+                return
+            
+            # Fallback to mock data
+            print("[TikTok API] Falling back to mock data")
+            mock_reason = "upstream_unavailable"
+        else:
+            mock_reason = "no_api_key"
             
         # Mock data generation (Fallback)
-        return self._generate_mock_data(query, max_results, order, min_ratio, min_comments)
+        result = self._generate_mock_data(query, max_results, order, min_ratio, min_comments, mock_reason)
+        for video in result['videos']:
+            yield 'video', project(video, projection)
+        yield 'summary', {key: value for key, value in result.items() if key != 'videos'}
+    
+    async def _search_videos(
+        self,
+        query: str,
+        max_results: int = 25,
+        order: str = "relevance",
+        published_after: Optional[str] = None,
+        video_duration: Optional[str] = None,
+        min_ratio: Optional[float] = None,
+        min_comments: Optional[int] = None,
+        tag: Optional[str] = None,
+        page_token: Optional[str] = None,
+        challenges: int = 1,
+        time_budget_ms: Optional[int] = None
+    ) -> Dict:
+        """Search without coalescing (see search_videos)"""
+        videos = []
+        async for event, data in self.stream_search(
+            query, max_results, order, published_after, video_duration, min_ratio,
+            min_comments, tag, page_token, challenges, time_budget_ms
+        ):
+            if event == 'video':
+                videos.append(data)
+            else:
+                summary = data
+        return {"videos": videos, **summary}
+
+    def _apply_filters(
+        self,
+        videos: List[Dict],
+        min_ratio: Optional[float],
+        min_comments: Optional[int]
+    ) -> List[Dict]:
+        """Apply the ratio and comment count post-filters"""
+        filtered = []
+        for video in videos:
+            stats = video['statistics']
+            
+            # Estimated follower counts don't count towards the ratio filter
+            ratio = 0
+            if stats['subscriberCount'] > 0 and not stats['subscriberCountEstimated']:
+                ratio = (stats['viewCount'] / stats['subscriberCount']) * 100
+                
+            if min_ratio is not None and ratio < min_ratio:
+                continue
+            if min_comments is not None and stats['commentCount'] < min_comments:
+                continue
+            filtered.append(video)
+        return filtered
 
-    def _search_rapidapi(
+    async def _search_rapidapi(
         self,
         api_key: str,
         query: str,
@@ -43,265 +314,264 @@ class TikTokService:
         order: str,
         published_after: Optional[str],
         video_duration: Optional[str],
-        min_ratio: Optional[float],
-        min_comments: Optional[int],
-        tag: Optional[str],
-        page_token: Optional[str]
-    ) -> Dict:
+        page_token: Optional[str],
+        challenges: int = 1,
+        time_budget_ms: Optional[int] = None
+    ) -> Optional[Dict]:
         """
         Execute search using RapidAPI TikTok Scraper
         API Documentation: https://rapidapi.com/DataFanatic/api/tiktok-scraper7
-        """
-        import json
         
+        Both steps go through the pooled async client for the RapidAPI host
+        (keep-alive, HTTP/2 when available), so they don't block the event loop.
+        With challenges > 1, posts of the top matching challenges are fetched
+        concurrently and merged; challenges that haven't answered within
+        time_budget_ms are skipped for this page and retried on the next.
+        The challenge lookup counts towards time_budget_ms too; if it uses
+        up the budget, it keeps running in the background to fill the
+        challenge cache, and the page is empty (incomplete, with the
+        LOOKUP_PENDING cursor) rather than failed.
+        
+        Returns the unfiltered page, or None if the API call failed.
+        """
         # TikTok Scraper API - 2-Step Search Flow
         # 1. Search for challenge/hashtag to get ID
         # 2. Get videos for that challenge
         
-        host = Settings().tiktok_rapidapi_host
-        headers = {
-            "X-RapidAPI-Key": api_key,
-            "X-RapidAPI-Host": host
-        }
+        client, headers = self._rapidapi(api_key)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + time_budget_ms / 1000 if time_budget_ms else None
+        count = min(max_results, MAX_PAGE_SIZE)
         
         try:
-            # Step 1: Search for challenge
-            search_url = f"https://{host}/challenge/search"
-            search_params = {"keywords": query}
-            
-            print(f"[TikTok API] Step 1: Searching challenge '{query}'")
-            response = requests.get(search_url, headers=headers, params=search_params, timeout=10)
-            
-            challenge_id = None
-            
-            if response.status_code == 200:
-                search_data = response.json()
-                # Extract challenge ID from response
-                if 'data' in search_data and isinstance(search_data['data'], dict):
-                    # Try both 'challenge_list' and 'challenges' for compatibility
-                    challenges = search_data['data'].get('challenge_list', []) or search_data['data'].get('challenges', [])
-                    if challenges:
-                        # Use the first matching challenge
-                        challenge_id = challenges[0].get('id')
-                        challenge_name = challenges[0].get('cha_name') or challenges[0].get('name')
-                        print(f"[TikTok API] Found challenge: {challenge_name} (ID: {challenge_id})")
-            
-            # If no challenge found, try using the query as ID directly (fallback)
-            if not challenge_id:
-                print("[TikTok API] No challenge found, trying query as ID")
-                challenge_id = query.replace("#", "").replace(" ", "")
-            
-            # Step 2: Get videos for challenge
-            posts_url = f"https://{host}/challenge/posts"
-            posts_params = {
-                "challenge_id": challenge_id,
-                "count": min(max_results, 50),
-                "cursor": int(page_token) if page_token and page_token.isdigit() else 0
-            }
-            
-            print(f"[TikTok API] Step 2: Getting posts for challenge {challenge_id}")
-            response = requests.get(posts_url, headers=headers, params=posts_params, timeout=15)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Extract videos
-                videos_data = []
-                if 'data' in data and isinstance(data['data'], dict):
-                    videos_data = data['data'].get('videos', [])
-                
-                print(f"[TikTok API] Found {len(videos_data)} videos")
-                
-                if videos_data:
-                    return self._process_tiktok_response(videos_data, query, order, max_results, min_ratio, min_comments)
-                else:
-                    print(f"[TikTok API] No videos in response, full response: {json.dumps(data, indent=2)[:500]}")
+            if page_token:
+                # Continue every challenge from where the previous page left off
+                positions = self._parse_positions(page_token)
             else:
-                error_text = response.text[:500]
-                print(f"[TikTok API] Error response: {error_text}")
+                # Step 1: Resolve the keyword to challenge IDs (cached)
+                keyword = ' '.join(query.lower().split())
+                lookup = self.challenge_flight.do(
+                    keyword, lambda: self._resolve_challenge_ids(client, headers, query)
+                )
+                if deadline is None:
+                    challenge_ids, _ = await lookup
+                else:
+                    try:
+                        challenge_ids, _ = await asyncio.wait_for(lookup, timeout=deadline - loop.time())
+                    except asyncio.TimeoutError:
+                        print("[TikTok API] Challenge lookup missed the time budget, finishing in the background")
+                        return {"videos": [], "nextPageToken": LOOKUP_PENDING, "complete": False}
                 
-        except requests.exceptions.RequestException as e:
+                # If no challenge found, try using the query as ID directly (fallback)
+                if not challenge_ids:
+                    print("[TikTok API] No challenge found, trying query as ID")
+                    challenge_ids = [query.replace("#", "").replace(" ", "")]
+                positions = [(challenge_id, 0) for challenge_id in challenge_ids[:challenges]]
+            
+            # Step 2: Get videos for each challenge concurrently
+            tasks = [
+                asyncio.ensure_future(self._fetch_challenge_posts(client, headers, challenge_id, count, position))
+                for challenge_id, position in positions
+            ]
+            timeout = max(deadline - loop.time(), 0) if deadline is not None else None
+            done, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                print(f"[TikTok API] {len(pending)} of {len(tasks)} challenges missed the time budget")
+        except CircuitOpenError as e:
+            print(f"[TikTok API] Skipping request: {str(e)}")
+            return None
+        except httpx.HTTPError as e:
             print(f"[TikTok API] Request error: {str(e)}")
+            return None
         except Exception as e:
             print(f"[TikTok API] Unexpected error: {str(e)}")
+            return None
+        
+        pages = []
+        next_positions = []
+        for (challenge_id, position), task in zip(positions, tasks):
+            if task in done and task.exception() is None:
+                items, next_cursor = task.result()
+                pages.append(items)
+                if next_cursor is not None:
+                    next_positions.append((challenge_id, next_cursor))
+            else:
+                if task in done:
+                    print(f"[TikTok API] Challenge {challenge_id} failed: {str(task.exception())}")
+                # Not fetched this time: retry from the same position next page
+                next_positions.append((challenge_id, position))
+        
+        if not pages:
+            if pending:
+                # Nothing arrived within the time budget: an empty page, not a failure
+                return {"videos": [], "nextPageToken": self._format_positions(next_positions), "complete": False}
+            return None
+        
+        # Interleave challenges by rank and drop videos posted under several of them
+        merged = []
+        seen_ids = set()
+        for items in zip_longest(*pages):
+            for item in items:
+                if item is None:
+                    continue
+                aweme_id = item.get('aweme_id') or item.get('video_id') or item.get('id')
+                if aweme_id is not None:
+                    if aweme_id in seen_ids:
+                        continue
+                    seen_ids.add(aweme_id)
+                merged.append(item)
+        
+        if not merged:
+            print("[TikTok API] No videos in response")
+            return None
         
-        # Fallback to mock data
-        print("[TikTok API] Falling back to mock data")
-        return self._generate_mock_data(query, max_results, order, min_ratio, min_comments)
+        page = self._process_tiktok_response(merged, self._format_positions(next_positions))
+        page['complete'] = len(pages) == len(tasks)
+        return page
     
-    def _process_tiktok_response(
+    def _parse_positions(self, upstream: str) -> List[Tuple[str, int]]:
+        """Parse 'challenge_id:cursor,...' into (challenge ID, cursor) pairs"""
+        positions = []
+        for part in upstream.split(','):
+            challenge_id, _, position = part.rpartition(':')
+            if not challenge_id or not position.isdigit():
+                raise ValueError("Invalid page token")
+            positions.append((challenge_id, int(position)))
+        return positions
+    
+    def _format_positions(self, positions: List[Tuple[str, int]]) -> Optional[str]:
+        """Inverse of _parse_positions; None when every challenge is exhausted"""
+        if not positions:
+            return None
+        return ','.join(f"{challenge_id}:{position}" for challenge_id, position in positions)
+    
+    async def _get(
         self,
-        items: list,
-        query: str,
-        order: str,
-        max_results: int,
-        min_ratio: Optional[float],
-        min_comments: Optional[int]
-    ) -> Dict:
-        """Process TikTok API response and map to our format"""
-        videos = []
+        client: httpx.AsyncClient,
+        path: str,
+        headers: Dict,
+        params: Dict,
+        timeout: float
+    ) -> httpx.Response:
+        """
+        GET through the RapidAPI host's circuit breaker.
         
-        for item in items[:max_results]:
-            try:
-                # TikTok Scraper API returns fields at top level, not nested
-                # Try top-level first, then fall back to nested structures
-                
-                # Get counts - check top level first (TikTok Scraper format)
-                view_count = (
-                    item.get('play_count') or 
-                    item.get('playCount') or 
-                    item.get('statistics', {}).get('playCount') or 
-                    item.get('statistics', {}).get('play_count') or 
-                    0
-                )
-                like_count = (
-                    item.get('digg_count') or 
-                    item.get('diggCount') or 
-                    item.get('statistics', {}).get('diggCount') or 
-                    item.get('statistics', {}).get('digg_count') or 
-                    0
-                )
-                comment_count = (
-                    item.get('comment_count') or 
-                    item.get('commentCount') or 
-                    item.get('statistics', {}).get('commentCount') or 
-                    item.get('statistics', {}).get('comment_count') or 
-                    0
-                )
-                share_count = (
-                    item.get('share_count') or 
-                    item.get('shareCount') or 
-                    item.get('statistics', {}).get('shareCount') or 
-                    item.get('statistics', {}).get('share_count') or 
-                    0
-                )
-                
-                # Author info
-                author = item.get('author', {}) or {}
-                subscriber_count = (
-                    author.get('follower_count') or 
-                    author.get('followerCount') or 
-                    author.get('fans') or 
-                    0
-                )
-                
-                # Calculate ratio
-                ratio = 0
-                if subscriber_count > 0:
-                    ratio = (view_count / subscriber_count) * 100
-                    
-                # Apply filters
-                if min_ratio is not None and ratio < min_ratio:
-                    continue
-                if min_comments is not None and comment_count < min_comments:
-                    continue
-                
-                # Get video ID
-                # Prioritize numeric video_id for embed compatibility
-                video_id = (
-                    item.get('video_id') or 
-                    item.get('aweme_id') or 
-                    item.get('id') or 
-                    str(random.randint(100000, 999999))
-                )
-                
-                # Get thumbnail - check top level first
-                cover_url = (
-                    item.get('cover') or 
-                    item.get('ai_dynamic_cover') or
-                    item.get('dynamic_cover') or
-                    item.get('origin_cover') or
-                    item.get('video', {}).get('cover') or
-                    item.get('video', {}).get('dynamicCover') or
-                    item.get('video', {}).get('originCover') or
-                    'https://placehold.co/480x360?text=TikTok'
-                )
-                
-                # Get description
-                desc = (
-                    item.get('title') or 
-                    item.get('desc') or 
-                    item.get('description') or 
-                    item.get('text') or
-                    ''
-                )
-                
-                # Get create time
-                create_time = (
-                    item.get('create_time') or 
-                    item.get('createTime') or 
-                    item.get('createtime') or 
-                    0
-                )
-                if create_time:
-                    published_at = datetime.fromtimestamp(create_time).isoformat() + "Z"
-                else:
-                    published_at = datetime.utcnow().isoformat() + "Z"
-                
-                # Get author name
-                author_name = (
-                    author.get('nickname') or 
-                    author.get('unique_id') or 
-                    author.get('uniqueId') or 
-                    'Unknown'
-                )
-                
-                # Extract hashtags from description if not provided
-                tags = item.get('hashtags', []) or item.get('challenges', []) or []
-                if not tags and desc:
-                    # Extract hashtags from description text
-                    hashtags = re.findall(r'#(\w+)', desc)
-                    tags = hashtags[:5]  # Limit to 5 tags
-                
-                # Estimate follower count if not available
-                # Use engagement rate to estimate: typical TikTok engagement is 5-10%
-                # If we have views and likes, we can estimate
-                if subscriber_count == 0 and view_count > 0:
-                    # Estimate based on engagement (assuming 8% engagement rate)
-                    estimated_followers = int(view_count / 8)  # Conservative estimate
-                    subscriber_count = estimated_followers
-                
-                # Recalculate ratio with estimated or real follower count
-                ratio = 0
-                if subscriber_count > 0:
-                    ratio = (view_count / subscriber_count) * 100
-                
-                video_data = {
-                    'id': str(video_id),
-                    'title': desc[:100] if desc else f'TikTok Video {video_id}',
-                    'description': desc,
-                    'channelTitle': author_name,
-                    'publishedAt': published_at,
-                    'thumbnails': {
-                        'default': {'url': cover_url, 'width': 120, 'height': 90},
-                        'medium': {'url': cover_url, 'width': 320, 'height': 180},
-                        'high': {'url': cover_url, 'width': 480, 'height': 360}
-                    },
-                    'tags': tags,
-                    'statistics': {
-                        'viewCount': view_count,
-                        'likeCount': like_count,
-                        'commentCount': comment_count,
-                        'shareCount': share_count,
-                        'subscriberCount': subscriber_count,
-                        'viewSubscriberRatio': round(ratio, 2)
-                    }
-                }
-                videos.append(video_data)
-                
-            except Exception as e:
-                print(f"[TikTok API] Error processing video item: {str(e)}")
-                continue
+        Raises CircuitOpenError without sending anything while the host is
+        failing. Transport errors, timeouts and 5xx/429 responses count as
+        failures; any other response counts as success.
+        """
+        breaker = get_circuit_breaker(client.base_url.host)
+        breaker.before_call()
+        try:
+            response = await client.get(path, headers=headers, params=params, timeout=timeout)
+        except httpx.HTTPError:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            # Cancelled (e.g. by the fan-out time budget): no verdict on the host
+            breaker.release()
+            raise
+        if response.status_code >= 500 or response.status_code == 429:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+    
+    async def _fetch_challenge_posts(
+        self,
+        client: httpx.AsyncClient,
+        headers: Dict,
+        challenge_id: str,
+        count: int,
+        position: int
+    ) -> Tuple[List[Dict], Optional[int]]:
+        """
+        Fetch one page of a challenge's posts.
+        
+        Returns the raw items and the API cursor of the next page (None if
+        the challenge has no more posts). Raises on API errors.
+        """
+        print(f"[TikTok API] Step 2: Getting posts for challenge {challenge_id}")
+        params = {"challenge_id": challenge_id, "count": count, "cursor": position}
+        response = await self._get(client, "/challenge/posts", headers, params, timeout=15)
+        if response.status_code != 200:
+            raise Exception(f"API error {response.status_code}: {response.text[:500]}")
         
-        # Get next page token
-        next_page_token = str(len(videos)) if len(videos) >= max_results else None
+        data = response.json()
+        # Extract videos and the API's own pagination cursor
+        items = []
+        next_cursor = None
+        if 'data' in data and isinstance(data['data'], dict):
+            items = data['data'].get('videos', []) or []
+            has_more = data['data'].get('hasMore', data['data'].get('has_more'))
+            cursor_value = data['data'].get('cursor')
+            if has_more and cursor_value is not None and str(cursor_value).isdigit():
+                next_cursor = int(cursor_value)
         
+        print(f"[TikTok API] Found {len(items)} videos for challenge {challenge_id}")
+        return items, next_cursor
+    
+    async def _resolve_challenge_ids(
+        self,
+        client: httpx.AsyncClient,
+        headers: Dict,
+        query: str
+    ) -> List[str]:
+        """
+        Look up the best matching challenge (hashtag) IDs for a search keyword.
+        
+        The keyword -> IDs mapping rarely changes, so it is kept in a persistent
+        cache; keywords without a challenge are cached too (with a shorter TTL)
+        so they don't hit /challenge/search again either. Failed lookups are
+        not cached.
+        
+        Returns up to MAX_CHALLENGES IDs, best match first (empty if none match).
+        """
+        keyword = ' '.join(query.lower().split())
+        cached_ids = self.challenge_cache.get(keyword)
+        if isinstance(cached_ids, str):
+            # Entry written before multiple challenges were cached
+            cached_ids = [cached_ids] if cached_ids else []
+        if cached_ids is not None:
+            print(f"[TikTok API] Step 1: Challenges for '{query}' cached ({', '.join(cached_ids) or 'none'})")
+            return cached_ids
+        
+        print(f"[TikTok API] Step 1: Searching challenge '{query}'")
+        response = await self._get(client, "/challenge/search", headers, {"keywords": query}, timeout=10)
+        if response.status_code != 200:
+            print(f"[TikTok API] Challenge search failed: {response.status_code}")
+            return []
+        
+        challenge_ids = []
+        search_data = response.json()
+        # Extract challenge IDs from response
+        if 'data' in search_data and isinstance(search_data['data'], dict):
+            # Try both 'challenge_list' and 'challenges' for compatibility
+            challenges = search_data['data'].get('challenge_list', []) or search_data['data'].get('challenges', [])
+            for challenge in challenges[:MAX_CHALLENGES]:
+                if challenge.get('id'):
+                    challenge_ids.append(str(challenge['id']))
+                    challenge_name = challenge.get('cha_name') or challenge.get('name')
+                    print(f"[TikTok API] Found challenge: {challenge_name} (ID: {challenge['id']})")
+        
+        if challenge_ids:
+            self.challenge_cache.set(keyword, challenge_ids)
+        else:
+            # Negative entry: no challenge for this keyword
+            self.challenge_cache.set(keyword, [], ttl=settings.tiktok_challenge_negative_ttl_seconds)
+        return challenge_ids
+    
+    def _process_tiktok_response(
+        self,
+        items: list,
+        next_cursor: Optional[str]
+    ) -> Dict:
+        """Process TikTok API response and map to our format (unfiltered)"""
         return {
-            "videos": videos,
-            "total": len(videos),
-            "query": query,
-            "order": order,
-            "nextPageToken": next_page_token
+            "videos": tiktok_normalizer.normalize(items),
+            "nextPageToken": next_cursor
         }
     
     def _generate_mock_data(
@@ -310,9 +580,10 @@ class TikTokService:
         max_results: int,
         order: str,
         min_ratio: Optional[float],
-        min_comments: Optional[int]
+        min_comments: Optional[int],
+        reason: str
     ) -> Dict:
-        """Generate mock data as fallback"""
+        """Generate mock data as fallback (reason: no_api_key or upstream_unavailable)"""
         videos = []
         for i in range(max_results):
             view_count = random.randint(1000, 1000000)
@@ -369,19 +640,151 @@ class TikTokService:
             "total": len(videos),
             "query": query,
             "order": order,
-            "nextPageToken": "mock_next_page_token" if len(videos) == max_results else None
+            "nextPageToken": "mock_next_page_token" if len(videos) == max_results else None,
+            "source": "mock",
+            "mockReason": reason
         }
     
-    def get_video_details(self, video_id: str) -> Optional[Dict]:
+    def _rapidapi(self, api_key: str) -> Tuple[httpx.AsyncClient, Dict]:
+        """Pooled client and request headers for the RapidAPI host"""
+        host = get_settings().tiktok_rapidapi_host
+        headers = {
+            "X-RapidAPI-Key": api_key,
+            "X-RapidAPI-Host": host
+        }
+        return get_http_client(host), headers
+    
+    async def _fetch_video_info(self, api_key: str, video_id: str) -> Optional[Dict]:
+        """
+        Fetch one video from the RapidAPI video-info endpoint and cache it.
+        
+        Returns the normalized video, or None if the API doesn't know it.
+        """
+        client, headers = self._rapidapi(api_key)
+        params = {"url": f"https://www.tiktok.com/@tiktok/video/{video_id}"}
+        
+        print(f"[TikTok API] Getting video info for {video_id}")
+        response = await self._get(client, "/", headers, params, timeout=10)
+        if response.status_code != 200:
+            raise Exception(f"TikTok API error: {response.status_code} - {response.text[:500]}")
+        
+        data = response.json()
+        item = data.get('data')
+        if data.get('code', 0) != 0 or not isinstance(item, dict) or not item:
+            return None
+        
+        video = tiktok_normalizer.normalize([item])[0]
+        video['id'] = video_id
+        self.video_cache.set(video_id, video)
+        return video
+    
+    async def _get_video(self, api_key: str, video_id: str) -> Tuple[Optional[Dict], bool]:
+        """
+        Get a video from the cache or the API.
+        
+        Concurrent lookups of the same uncached ID share one upstream request.
+        
+        Returns the video (None if not found) and whether it was cached.
+        """
+        video = self.video_cache.get(video_id)
+        if video is not None:
+            return video, True
+        
+        video, _ = await self.detail_flight.do(video_id, lambda: self._fetch_video_info(api_key, video_id))
+        return video, False
+    
+    async def get_video_details(self, video_id: str, fields: Optional[str] = None) -> Optional[Dict]:
         """
         Get detailed information about a specific video
+        
+        Videos seen in recent searches are served from the video cache;
+        others are fetched from the RapidAPI video-info endpoint. Like search
+        responses, the result carries `source` (live, cached or mock).
+        
+        Args:
+            video_id: TikTok video (aweme) ID
+            fields: Projection of the returned video (see projection.parse_fields)
+        
+        Returns:
+            Dictionary with video details or None if not found
         """
+        projection = parse_fields(fields)
         api_key = Settings.get_tiktok_api_key()
-        if api_key:
-            # Implement real detail fetch here if needed
-            pass
-
-        # Mock implementation
+        if not api_key:
+            return project(self._generate_mock_details(video_id, "no_api_key"), projection)
+        if video_id.startswith("tiktok_"):
+            # ID of a generated mock video
+            return project(self._generate_mock_details(video_id, "mock_video"), projection)
+        if not video_id.isdigit():
+            raise ValueError("Invalid TikTok video ID")
+        
+        video, cached = await self._get_video(api_key, video_id)
+        if video is None:
+            return None
+        return project(dict(video, source="cached" if cached else "live"), projection)
+    
+    async def get_videos_batch(self, video_ids: List[str], fields: Optional[str] = None) -> Dict:
+        """
+        Get details for many videos at once
+        
+        The video-info endpoint takes one ID per request, so uncached IDs are
+        fetched concurrently, at most TIKTOK_DETAIL_CONCURRENCY at a time.
+        
+        Args:
+            video_ids: TikTok video IDs (up to MAX_BATCH_IDS)
+            fields: Projection of the returned videos (see projection.parse_fields)
+        
+        Returns:
+            Dictionary with found videos (in input order), the IDs not found
+            and the IDs whose lookup failed
+        """
+        video_ids = list(dict.fromkeys(v.strip() for v in video_ids if v and v.strip()))
+        if not video_ids:
+            raise ValueError("No video IDs given")
+        if len(video_ids) > MAX_BATCH_IDS:
+            raise ValueError(f"At most {MAX_BATCH_IDS} video IDs per batch")
+        invalid = [v for v in video_ids if not v.isdigit()]
+        if invalid:
+            raise ValueError(f"Invalid TikTok video IDs: {', '.join(invalid[:5])}")
+        projection = parse_fields(fields)
+        
+        api_key = Settings.get_tiktok_api_key()
+        if not api_key:
+            raise ValueError("TikTok API key not configured")
+        
+        semaphore = asyncio.Semaphore(settings.tiktok_detail_concurrency)
+        
+        async def lookup(video_id: str) -> Tuple[Optional[Dict], bool]:
+            video = self.video_cache.get(video_id)
+            if video is not None:
+                return video, True
+            async with semaphore:
+                return await self._get_video(api_key, video_id)
+        
+        results = await asyncio.gather(*(lookup(v) for v in video_ids), return_exceptions=True)
+        
+        videos = []
+        not_found = []
+        failed = []
+        for video_id, result in zip(video_ids, results):
+            if isinstance(result, Exception):
+                print(f"[TikTok API] Video info for {video_id} failed: {str(result)}")
+                failed.append(video_id)
+            elif result[0] is None:
+                not_found.append(video_id)
+            else:
+                video, cached = result
+                videos.append(project(dict(video, source="cached" if cached else "live"), projection))
+        
+        return {
+            "videos": videos,
+            "notFound": not_found,
+            "failed": failed,
+            "total": len(videos)
+        }
+    
+    def _generate_mock_details(self, video_id: str, reason: str) -> Dict:
+        """Mock video details (reason: no_api_key or mock_video)"""
         return {
             'id': video_id,
             'title': f'TikTok Video Details {video_id}',
@@ -404,7 +807,9 @@ class TikTokService:
                 'viewCount': 50000,
                 'likeCount': 2500,
                 'commentCount': 100
-            }
+            },
+            'source': 'mock',
+            'mockReason': reason
         }
 
 tiktok_service = TikTokService()
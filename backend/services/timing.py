@@ -0,0 +1,40 @@
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Dict, TypeVar
+
+T = TypeVar('T')
+
+
+class StageTimer:
+    """Records wall-clock durations (ms) of named request stages"""
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    def _record(self, name: str, started: float):
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block as stage `name`"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, started)
+
+    async def measure(self, name: str, awaitable: Awaitable[T]) -> T:
+        """Await `awaitable` and record its duration as stage `name`"""
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self._record(name, started)
+
+    def as_dict(self) -> Dict[str, float]:
+        """Stage durations plus the total elapsed time, rounded to 0.1 ms"""
+        timings = {name: round(ms, 1) for name, ms in self.stages.items()}
+        timings['total'] = round((time.perf_counter() - self._start) * 1000, 1)
+        return timings
@@ -0,0 +1,152 @@
+import json
+import threading
+from typing import Dict, Optional
+
+from googleapiclient.discovery_cache import get_static_doc
+
+from config import Settings, add_settings_listener, get_settings
+from services.http_client import get_http_client
+from services.quota import QUOTA_COSTS, current_quota_usage, key_id, quota_ledger
+
+# Maximum number of IDs accepted by videos.list / channels.list
+MAX_IDS_PER_CALL = 50
+
+
+class YouTubeApiError(Exception):
+    """Non-2xx response from the YouTube Data API"""
+
+    def __init__(self, status: int, content: str):
+        self.status = status
+        self.content = content
+        super().__init__(f"YouTube API error: {status} - {content}")
+
+
+class YouTubeApiClient:
+    """Async YouTube Data API client bound to a single API key"""
+
+    def __init__(self, api_key: str, discovery_document: Dict, root_url: Optional[str] = None):
+        self.api_key = api_key
+        self._discovery_document = discovery_document
+        self._base_url = (root_url or discovery_document['rootUrl']) + discovery_document['servicePath']
+        self._urls: Dict[str, str] = {}
+
+    def _method_url(self, method: str) -> str:
+        """Resolve a method name such as 'search.list' to its request URL"""
+        url = self._urls.get(method)
+        if url is None:
+            resource, name = method.split('.')
+            path = self._discovery_document['resources'][resource]['methods'][name]['path']
+            url = self._base_url + path
+            self._urls[method] = url
+        return url
+
+    async def call(self, method: str, **params) -> Dict:
+        """
+        Call a YouTube Data API method
+
+        Args:
+            method: Discovery method name (e.g. 'search.list', 'videos.list')
+            **params: Query parameters for the method
+
+        Returns:
+            Decoded JSON response
+        """
+        params = dict(params, key=self.api_key)
+        response = await get_http_client().get(self._method_url(method), params=params)
+        if response.status_code != 200:
+            raise YouTubeApiError(response.status_code, response.text)
+        return response.json()
+
+
+class YouTubeClientManager:
+    """
+    Keeps a long-lived YouTube API client per API key in the key pool.
+
+    The discovery document is loaded once from the copy bundled with
+    google-api-python-client and used to resolve method URLs. Requests go
+    through the shared pooled async HTTP client, so connections stay open
+    between searches. Clients are rebuilt when the configured keys change
+    or a settings change is announced. Each call goes to the key with the
+    most remaining quota.
+    """
+
+    def __init__(self):
+        self._discovery_document: Optional[Dict] = None
+        self._clients: Dict[str, YouTubeApiClient] = {}
+        self._lock = threading.Lock()
+        add_settings_listener(self._on_settings_change)
+
+    def _on_settings_change(self, new_settings):
+        """Drop the clients so the next call picks up new keys / root URL"""
+        with self._lock:
+            self._clients = {}
+
+    def _get_discovery_document(self) -> Dict:
+        """Load the bundled YouTube v3 discovery document (once)"""
+        if self._discovery_document is None:
+            content = get_static_doc('youtube', 'v3')
+            if not content:
+                raise RuntimeError("Bundled YouTube discovery document not found")
+            self._discovery_document = json.loads(content)
+        return self._discovery_document
+
+    def _get_clients(self) -> Dict[str, YouTubeApiClient]:
+        """Get the clients for the configured key pool"""
+        api_keys = Settings.get_api_keys()
+        if not api_keys:
+            raise ValueError("YouTube API key not configured")
+
+        with self._lock:
+            if list(self._clients) != api_keys:
+                # Keys changed (or first use): keep clients for keys still in the pool
+                self._clients = {
+                    api_key: self._clients.get(api_key) or YouTubeApiClient(
+                        api_key,
+                        self._get_discovery_document(),
+                        root_url=get_settings().youtube_api_root_url
+                    )
+                    for api_key in api_keys
+                }
+            return self._clients
+
+    def check_budget(self, units: int):
+        """Raise QuotaExceededError if no key (or the current user) can afford units"""
+        usage = current_quota_usage()
+        quota_ledger.check(list(self._get_clients()), units, usage.user if usage else None)
+
+    def quota_status(self, user: Optional[str] = None) -> Dict:
+        """Today's quota usage across the key pool"""
+        return quota_ledger.status(Settings.get_api_keys(), user)
+
+    async def call(self, method: str, **params) -> Dict:
+        """
+        Call a YouTube Data API method on the key with the most remaining quota
+
+        The call's quota cost is reserved before anything is sent, so an
+        over-budget call fails without an upstream request. A key that
+        YouTube reports as quotaExceeded is taken out of rotation and the
+        call is retried on the next key; the rejected attempt isn't charged
+        to the request or the user.
+        """
+        clients = self._get_clients()
+        usage = current_quota_usage()
+        user = usage.user if usage else None
+        cost = QUOTA_COSTS.get(method, 1)
+
+        while True:
+            api_key = quota_ledger.acquire(list(clients), cost, user)
+            if usage is not None:
+                usage.charge(method)
+            try:
+                return await clients[api_key].call(method, **params)
+            except YouTubeApiError as e:
+                if e.status == 403 and 'quotaExceeded' in e.content:
+                    print(f"[YouTube API] Key {key_id(api_key)} exhausted, rotating")
+                    quota_ledger.mark_exhausted(api_key)
+                    quota_ledger.refund_user(user, cost)
+                    if usage is not None:
+                        usage.refund(method)
+                    continue
+                raise
+
+youtube_client_manager = YouTubeClientManager()
@@ -1,20 +1,423 @@
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from typing import List, Dict, Optional
-from config import Settings
+import asyncio
+import time
+from typing import AsyncIterator, Callable, List, Dict, Optional, Tuple
+from config import settings
+from services.cache import TTLCache, StaleWhileRevalidateCache, search_cache_key
+from services.cursor import ContinuationCursor, search_fingerprint
+from services.timing import StageTimer
+from services.single_flight import SingleFlight
+from services.quota import QuotaExceededError, SEARCH_PAGE_COST, quota_ledger, track_quota_usage
+from services.projection import parse_fields, project
+from services.ranking import TopK, get_sort_key
+from services.youtube_client import youtube_client_manager, YouTubeApiError, MAX_IDS_PER_CALL
+
+# Maximum number of IDs accepted by get_videos_batch
+MAX_BATCH_IDS = 500
+# Largest topK of a top-k search
+MAX_TOP_K = 500
+# Largest maxResults; above one page (50) the search runs in large-result mode
+MAX_LARGE_RESULTS = 1000
+
+# Partial-response masks ('fields' parameter): only what our formatters read
+SEARCH_FIELDS = 'nextPageToken,items(id/videoId,snippet/channelId)'
+VIDEO_FIELDS = (
+    'items(id,snippet(channelId,title,description,channelTitle,publishedAt,thumbnails(default,medium,high),tags),'
+    'statistics(viewCount,likeCount,commentCount))'
+)
+CHANNEL_FIELDS = 'items(id,statistics/subscriberCount)'
 
 class YouTubeService:
     def __init__(self):
-        pass
+        self.page_cache = TTLCache(settings.search_cache_ttl_seconds, settings.search_cache_max_entries)
+        self.channel_cache = TTLCache(settings.channel_cache_ttl_seconds, settings.channel_cache_max_entries)
+        self.video_cache = StaleWhileRevalidateCache(
+            settings.video_cache_ttl_seconds,
+            settings.video_cache_max_entries,
+            batch_size=MAX_IDS_PER_CALL,
+            missing_ttl=settings.video_cache_missing_ttl_seconds
+        )
+        # Identical in-flight searches share one execution
+        self.search_flight = SingleFlight()
     
-    def _get_youtube_client(self):
-        """Get YouTube API client with current API key"""
-        api_key = Settings.get_api_key()
-        if not api_key:
-            raise ValueError("YouTube API key not configured")
-        return build('youtube', 'v3', developerKey=api_key)
+    async def _fetch_video_batch(self, video_ids: List[str]) -> Dict[str, Dict]:
+        """Fetch statistics and snippets for up to 50 video IDs"""
+        videos_response = await youtube_client_manager.call(
+            'videos.list',
+            part='statistics,snippet',
+            id=','.join(video_ids),
+            fields=VIDEO_FIELDS
+        )
+        return {item['id']: item for item in videos_response.get('items', [])}
+
+    async def _fetch_video_items(self, video_ids: List[str]) -> List[Dict]:
+        """
+        Get videos.list items for video IDs, in the order given.
+
+        Items come from the stale-while-revalidate video cache: expired
+        entries are served immediately and refreshed in the background,
+        and only never-seen IDs are fetched before returning.
+        """
+        items = await self.video_cache.get_many(video_ids, self._fetch_video_batch)
+        return [items[video_id] for video_id in video_ids if video_id in items]
+
+    async def _fetch_channel_batch(self, channel_ids: List[str]) -> Dict[str, int]:
+        """Fetch subscriber counts for up to 50 channel IDs and cache them"""
+        channels_response = await youtube_client_manager.call(
+            'channels.list',
+            part='statistics',
+            id=','.join(channel_ids),
+            fields=CHANNEL_FIELDS
+        )
+        subscribers = {
+            item['id']: int(item['statistics'].get('subscriberCount', 0))
+            for item in channels_response.get('items', [])
+        }
+        # Channels missing from the response are cached as 0 so they aren't re-requested
+        for channel_id in channel_ids:
+            self.channel_cache.set(channel_id, subscribers.setdefault(channel_id, 0))
+        return subscribers
+
+    async def _fetch_channel_subscribers(self, channel_ids: List[str]) -> Dict[str, int]:
+        """
+        Get subscriber counts for channel IDs.
+
+        Counts come from the channel cache; only uncached IDs go upstream,
+        in concurrent channels.list calls of up to 50 IDs each.
+        """
+        subscribers = {}
+        missing = []
+        for channel_id in channel_ids:
+            count = self.channel_cache.get(channel_id)
+            if count is None:
+                missing.append(channel_id)
+            else:
+                subscribers[channel_id] = count
+        
+        if missing:
+            batches = [missing[i:i + MAX_IDS_PER_CALL] for i in range(0, len(missing), MAX_IDS_PER_CALL)]
+            for fetched in await asyncio.gather(*(self._fetch_channel_batch(batch) for batch in batches)):
+                subscribers.update(fetched)
+        return subscribers
+    
+    def _build_search_params(
+        self,
+        query: str,
+        max_results: int,
+        order: str,
+        published_after: Optional[str],
+        video_duration: Optional[str]
+    ) -> Dict:
+        """Build search.list parameters (without pageToken)"""
+        # Calculate publishedAfter date
+        published_after_rfc = None
+        if published_after:
+            from datetime import datetime, timedelta
+            now = datetime.utcnow()
+            if published_after == "1m":
+                date = now - timedelta(days=30)
+            elif published_after == "2m":
+                date = now - timedelta(days=60)
+            elif published_after == "6m":
+                date = now - timedelta(days=180)
+            elif published_after == "1y":
+                date = now - timedelta(days=365)
+            
+            if published_after != "all" and published_after in ["1m", "2m", "6m", "1y"]:
+                published_after_rfc = date.isoformat("T") + "Z"
+
+        search_params = {
+            'q': query,
+            'part': 'id,snippet',
+            'maxResults': max_results,
+            'order': order,
+            'type': 'video',
+            'fields': SEARCH_FIELDS
+        }
+        
+        if published_after_rfc:
+            search_params['publishedAfter'] = published_after_rfc
+            
+        if video_duration and video_duration != "any":
+            search_params['videoDuration'] = video_duration
+
+        return search_params
+
+    def _format_video(self, item: Dict, subscriber_count: int) -> Dict:
+        """Map a videos.list item to our video format"""
+        view_count = int(item['statistics'].get('viewCount', 0))
+        
+        # Calculate ratio
+        ratio = 0
+        if subscriber_count > 0:
+            ratio = (view_count / subscriber_count) * 100
+        
+        return {
+            'id': item['id'],
+            'title': item['snippet']['title'],
+            'description': item['snippet']['description'],
+            'channelTitle': item['snippet']['channelTitle'],
+            'publishedAt': item['snippet']['publishedAt'],
+            'thumbnails': item['snippet']['thumbnails'],
+            'tags': item['snippet'].get('tags', []),
+            'statistics': {
+                'viewCount': view_count,
+                'likeCount': int(item['statistics'].get('likeCount', 0)),
+                'commentCount': int(item['statistics'].get('commentCount', 0)),
+                'subscriberCount': subscriber_count,
+                'viewSubscriberRatio': round(ratio, 2)
+            }
+        }
+
+    async def _search_page(self, search_params: Dict, page_token: Optional[str], cache_key: tuple, timer: StageTimer):
+        """
+        Start fetching one page: returns (cached_page, None) on a page cache
+        hit, otherwise (None, search_response) after calling search.list
+        """
+        page = self.page_cache.get(cache_key)
+        if page is not None:
+            return page, None
+        if page_token:
+            search_params = dict(search_params, pageToken=page_token)
+        
+        # Reject before spending anything if a whole page no longer fits the budget
+        youtube_client_manager.check_budget(SEARCH_PAGE_COST)
+        
+        return None, await timer.measure('search', youtube_client_manager.call('search.list', **search_params))
+
+    async def _hydrate_page(self, search_response: Dict, timer: StageTimer) -> Dict:
+        """Hydrate search.list results with video and channel statistics (unfiltered)"""
+        next_page_token = search_response.get('nextPageToken')
+        search_items = search_response.get('items', [])
+        
+        # Get video IDs
+        video_ids = [item['id']['videoId'] for item in search_items]
+        
+        if not video_ids:
+            return {"videos": [], "nextPageToken": None}
+        
+        # Channel IDs are already in the search snippets, so the channel
+        # lookup runs concurrently with the video statistics lookup
+        channel_ids = list(set(item['snippet']['channelId'] for item in search_items))
+        
+        with timer.stage('hydrate'):
+            video_items, channels_data = await asyncio.gather(
+                timer.measure('videos', self._fetch_video_items(video_ids)),
+                timer.measure('channels', self._fetch_channel_subscribers(channel_ids))
+            )
+        
+        videos = [
+            self._format_video(item, channels_data.get(item['snippet']['channelId'], 0))
+            for item in video_items
+        ]
+        return {"videos": videos, "nextPageToken": next_page_token}
+
+    async def _hydrate_video_ids(self, video_ids: List[str]) -> List[Dict]:
+        """Hydrate known video IDs (e.g. buffered results) from the stats caches"""
+        video_items = await self._fetch_video_items(video_ids)
+        channel_ids = list(set(item['snippet']['channelId'] for item in video_items))
+        channels_data = await self._fetch_channel_subscribers(channel_ids)
+        return [
+            self._format_video(item, channels_data.get(item['snippet']['channelId'], 0))
+            for item in video_items
+        ]
+
+    async def _iter_pages(
+        self,
+        query: str,
+        page_size: int,
+        order: str,
+        published_after: Optional[str],
+        video_duration: Optional[str],
+        page_token: Optional[str],
+        max_pages: int,
+        deadline: Optional[float],
+        remaining: Callable[[], int],
+        timer: StageTimer
+    ) -> AsyncIterator[Dict]:
+        """
+        Yield unfiltered, hydrated search pages starting at page_token.
+
+        Stops when there is no next page, max_pages were produced, the
+        monotonic deadline has passed, or remaining() (results the caller
+        still needs) drops to 0. When a page's search.list results can't
+        satisfy remaining() on their own, the next page's search.list is
+        started while the current page is being hydrated.
+        """
+        search_params = self._build_search_params(query, page_size, order, published_after, video_duration)
+
+        def start(token: Optional[str]) -> asyncio.Future:
+            cache_key = search_cache_key(query, page_size, order, published_after, video_duration, token)
+            future = asyncio.ensure_future(self._search_page(search_params, token, cache_key, timer))
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            return future
+
+        def may_continue(next_token: Optional[str], pages: int) -> bool:
+            return bool(next_token) and pages < max_pages and (deadline is None or time.monotonic() < deadline)
+
+        token = page_token
+        pending = start(token)
+        pages = 0
+        try:
+            while pending is not None:
+                page, search_response = await pending
+                pending = None
+                pages += 1
+                
+                if page is None:
+                    next_token = search_response.get('nextPageToken')
+                    if may_continue(next_token, pages) and remaining() > len(search_response.get('items', [])):
+                        # Even if every result passes the filters we need more: prefetch
+                        pending = start(next_token)
+                    page = await self._hydrate_page(search_response, timer)
+                    cache_key = search_cache_key(query, page_size, order, published_after, video_duration, token)
+                    self.page_cache.set(cache_key, page)
+                
+                yield page
+                
+                token = page['nextPageToken']
+                if pending is None and may_continue(token, pages) and remaining() > 0:
+                    pending = start(token)
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def _pipeline_pages(
+        self,
+        query: str,
+        page_size: int,
+        order: str,
+        published_after: Optional[str],
+        video_duration: Optional[str],
+        page_token: Optional[str],
+        max_pages: int,
+        deadline: Optional[float],
+        remaining: Callable[[], int],
+        timer: StageTimer,
+        depth: int
+    ) -> AsyncIterator[Dict]:
+        """
+        Pipelined _iter_pages for large result sets (same arguments and pages).
+
+        The search.list chain runs ahead in its own task, and every page is
+        hydrated as soon as its search results arrive, so page N+1's
+        search.list (and hydration) overlap page N's hydration and its
+        consumption. At most `depth` pages are in flight or waiting to be
+        consumed, which bounds both upstream concurrency and memory. Like
+        _iter_pages, a search.list is only started while the results
+        already on their way can't satisfy remaining(), to avoid spending
+        quota on pages nobody needs.
+        """
+        search_params = self._build_search_params(query, page_size, order, published_after, video_duration)
+        slots = asyncio.Semaphore(depth)
+        consumed = asyncio.Event()
+        ready: asyncio.Queue = asyncio.Queue()
+        ahead = 0  # Unfiltered results fetched but not yet consumed
+
+        def settled(result: Optional[Dict] = None, error: Optional[Exception] = None) -> asyncio.Future:
+            future = asyncio.get_running_loop().create_future()
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+            return future
+
+        async def produce():
+            nonlocal ahead
+            token = page_token
+            pages = 0
+            try:
+                while pages < max_pages:
+                    await slots.acquire()
+                    # Wait until the results on their way are known not to be enough
+                    while ahead and remaining() <= ahead:
+                        consumed.clear()
+                        await consumed.wait()
+                    if remaining() <= 0 or (deadline is not None and time.monotonic() >= deadline):
+                        break
+                    pages += 1
+                    cache_key = search_cache_key(query, page_size, order, published_after, video_duration, token)
+                    page, search_response = await self._search_page(search_params, token, cache_key, timer)
+                    if page is not None:
+                        hydrated = settled(page)
+                        count = len(page['videos'])
+                        token = page['nextPageToken']
+                    else:
+                        hydrated = asyncio.ensure_future(self._hydrate_and_cache(search_response, cache_key, timer))
+                        count = len(search_response.get('items', []))
+                        token = search_response.get('nextPageToken')
+                    hydrated.add_done_callback(lambda f: f.cancelled() or f.exception())
+                    ahead += count
+                    await ready.put((hydrated, count))
+                    if not token:
+                        break
+            except Exception as e:
+                failed = settled(error=e)
+                failed.add_done_callback(lambda f: f.exception())
+                await ready.put((failed, 0))
+            await ready.put(None)
+
+        producer = asyncio.ensure_future(produce())
+        current = None
+        try:
+            while True:
+                entry = await ready.get()
+                if entry is None:
+                    break
+                current, count = entry
+                page = await current
+                current = None
+                yield page
+                ahead -= count
+                slots.release()
+                consumed.set()
+        finally:
+            producer.cancel()
+            if current is not None:
+                current.cancel()
+            while not ready.empty():
+                entry = ready.get_nowait()
+                if entry is not None:
+                    entry[0].cancel()
+
+    async def _hydrate_and_cache(self, search_response: Dict, cache_key: tuple, timer: StageTimer) -> Dict:
+        """Hydrate a search.list response and cache the page"""
+        page = await self._hydrate_page(search_response, timer)
+        self.page_cache.set(cache_key, page)
+        return page
+
+    def _apply_filters(
+        self,
+        videos: List[Dict],
+        min_ratio: Optional[float],
+        min_comments: Optional[int],
+        tag: Optional[str]
+    ) -> List[Dict]:
+        """Apply the ratio, comment count and tag post-filters"""
+        tag_lower = tag.lower() if tag else None
+        filtered = []
+        for video in videos:
+            stats = video['statistics']
+            
+            # Filter by min_ratio if specified
+            if min_ratio is not None:
+                ratio = 0
+                if stats['subscriberCount'] > 0:
+                    ratio = (stats['viewCount'] / stats['subscriberCount']) * 100
+                if ratio < min_ratio:
+                    continue
+
+            # Filter by min_comments if specified
+            if min_comments is not None and stats['commentCount'] < min_comments:
+                continue
+            
+            # Filter by tag if specified
+            if tag_lower and not any(t.lower() == tag_lower for t in video['tags']):
+                continue
+                
+            filtered.append(video)
+        return filtered
     
-    def search_videos(
+    async def search_videos(
         self,
         query: str,
         max_results: int = 25,
@@ -24,188 +427,377 @@ class YouTubeService:
         min_ratio: Optional[float] = None,
         min_comments: Optional[int] = None,
         tag: Optional[str] = None,
-        page_token: Optional[str] = None
+        page_token: Optional[str] = None,
+        fill: bool = False,
+        max_pages: Optional[int] = None,
+        time_budget_ms: Optional[int] = None,
+        sort_by: Optional[str] = None,
+        top_k: Optional[int] = None,
+        user: Optional[str] = None,
+        fields: Optional[str] = None
     ) -> Dict:
         """
         Search for videos using YouTube Data API
         
+        Unfiltered pages are cached, so repeating a search or changing only
+        the post-filters (min_ratio, min_comments, tag) does not re-hit the API.
+        
+        The returned nextPageToken is an opaque continuation cursor: it
+        carries the upstream pageToken, filtered results that didn't fit in
+        this response (served first on the next page) and the IDs already
+        returned, so pages never repeat a video.
+        
+        Identical searches arriving while one is in flight share its
+        execution and result (marked `coalesced`) instead of spending quota
+        again; with per-user budgets only searches of the same user do.
+        
         Args:
             query: Search query string
-            max_results: Maximum number of results (default: 25)
+            max_results: Maximum number of results (default: 25). Above
+                one page (50) the search runs in large-result mode: it
+                fills like `fill`, within LARGE_RESULT_MAX_PAGES pages and
+                LARGE_RESULT_TIME_BUDGET_MS by default, with the pages
+                pipelined (see _pipeline_pages)
             order: Sort order (date, rating, relevance, viewCount)
+            page_token: nextPageToken of a previous response
+            fill: Keep fetching pages until max_results videos pass the
+                filters, up to max_pages pages or time_budget_ms
+            sort_by: Rank the results by this key (see ranking.SORT_KEYS)
+            top_k: Return the top_k best results by sort_by across up to
+                max_pages pages (default TOP_K_MAX_PAGES) or
+                time_budget_ms, instead of one page of results
+            user: Caller identity for per-user quota budgets
+            fields: Projection of the returned videos (see projection.parse_fields)
         
         Returns:
             Dictionary with videos list and metadata
         """
+        projection = parse_fields(fields)
+        key = (
+            query, max_results, order, published_after, video_duration, min_ratio,
+            min_comments, tag, page_token, fill, max_pages, time_budget_ms, sort_by, top_k
+        )
+        if user and quota_ledger.user_daily_limit is not None:
+            # The execution checks and charges its caller's budget, so with
+            # per-user budgets only the same user's searches are coalesced
+            key += (user,)
+        result, shared = await self.search_flight.do(key, lambda: self._search_videos(
+            query, max_results, order, published_after, video_duration, min_ratio,
+            min_comments, tag, page_token, fill, max_pages, time_budget_ms, sort_by, top_k, user
+        ))
+        if projection is not None:
+            result = dict(result, videos=[project(video, projection) for video in result['videos']])
+        return dict(result, coalesced=shared)
+    
+    async def _search_videos(
+        self,
+        query: str,
+        max_results: int = 25,
+        order: str = "relevance",
+        published_after: Optional[str] = None,
+        video_duration: Optional[str] = None,
+        min_ratio: Optional[float] = None,
+        min_comments: Optional[int] = None,
+        tag: Optional[str] = None,
+        page_token: Optional[str] = None,
+        fill: bool = False,
+        max_pages: Optional[int] = None,
+        time_budget_ms: Optional[int] = None,
+        sort_by: Optional[str] = None,
+        top_k: Optional[int] = None,
+        user: Optional[str] = None
+    ) -> Dict:
+        """Search without coalescing (see search_videos)"""
+        videos = []
+        async for event, data in self.stream_search(
+            query, max_results, order, published_after, video_duration, min_ratio,
+            min_comments, tag, page_token, fill, max_pages, time_budget_ms, sort_by, top_k, user
+        ):
+            if event == 'video':
+                videos.append(data)
+            else:
+                summary = data
+        return {"videos": videos, **summary}
+    
+    async def stream_search(
+        self,
+        query: str,
+        max_results: int = 25,
+        order: str = "relevance",
+        published_after: Optional[str] = None,
+        video_duration: Optional[str] = None,
+        min_ratio: Optional[float] = None,
+        min_comments: Optional[int] = None,
+        tag: Optional[str] = None,
+        page_token: Optional[str] = None,
+        fill: bool = False,
+        max_pages: Optional[int] = None,
+        time_budget_ms: Optional[int] = None,
+        sort_by: Optional[str] = None,
+        top_k: Optional[int] = None,
+        user: Optional[str] = None,
+        fields: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Search, yielding results as soon as they are available
+        
+        Takes the same arguments as search_videos. Yields ('video', video)
+        for every result as soon as its page is hydrated and it passes the
+        filters, then one ('summary', ...) with the search_videos response
+        fields other than the videos (total, nextPageToken, quotaUsed, ...).
+        Results are not kept, so memory doesn't grow with the result count.
+        Streams are not coalesced.
+        
+        With sort_by the response's results are yielded in ranked order
+        once they are all known; with top_k the scan keeps only the best
+        top_k results seen so far (see ranking.TopK) and yields them at the
+        end. A top-k ranking covers the scanned pages as a whole, so it has
+        no nextPageToken.
+        """
+        projection = parse_fields(fields)
+        sort_key = get_sort_key(sort_by) if sort_by else None
+        if top_k is not None and not 1 <= top_k <= MAX_TOP_K:
+            raise ValueError(f"topK must be between 1 and {MAX_TOP_K}")
+        if top_k and sort_key is None:
+            raise ValueError("topK requires sortBy")
+        if not 1 <= max_results <= MAX_LARGE_RESULTS:
+            raise ValueError(f"maxResults must be between 1 and {MAX_LARGE_RESULTS}")
+        large = max_results > MAX_IDS_PER_CALL
+        
+        search = search_fingerprint(query, order, published_after, video_duration)
+        if page_token:
+            cursor = ContinuationCursor.decode(page_token, 'youtube', search)
+        else:
+            cursor = ContinuationCursor('youtube', search)
+        
         try:
-            youtube = self._get_youtube_client()
-            
-            # Calculate publishedAfter date
-            published_after_rfc = None
-            if published_after:
-                from datetime import datetime, timedelta
-                now = datetime.utcnow()
-                if published_after == "1m":
-                    date = now - timedelta(days=30)
-                elif published_after == "2m":
-                    date = now - timedelta(days=60)
-                elif published_after == "6m":
-                    date = now - timedelta(days=180)
-                elif published_after == "1y":
-                    date = now - timedelta(days=365)
-                
-                if published_after != "all" and published_after in ["1m", "2m", "6m", "1y"]:
-                    published_after_rfc = date.isoformat("T") + "Z"
-
-            # Search for videos
-            search_params = {
-                'q': query,
-                'part': 'id,snippet',
-                'maxResults': max_results,
-                'order': order,
-                'type': 'video'
-            }
+            timer = StageTimer()
+            usage = track_quota_usage(user)
             
-            if published_after_rfc:
-                search_params['publishedAfter'] = published_after_rfc
-                
-            if video_duration and video_duration != "any":
-                search_params['videoDuration'] = video_duration
-                
-            if page_token:
-                search_params['pageToken'] = page_token
-                
-            search_response = youtube.search().list(**search_params).execute()
+            if fill or top_k or large:
+                # search.list costs the same for any page size, so scan full pages
+                page_size = MAX_IDS_PER_CALL
+                if top_k:
+                    max_pages = max_pages or settings.top_k_max_pages
+                elif large:
+                    max_pages = max_pages or settings.large_result_max_pages
+                else:
+                    max_pages = max_pages or settings.fill_max_pages
+                if large:
+                    time_budget_ms = time_budget_ms or settings.large_result_time_budget_ms
+                else:
+                    time_budget_ms = time_budget_ms or settings.fill_time_budget_ms
+                deadline = time.monotonic() + time_budget_ms / 1000
+            else:
+                page_size = max_results
+                max_pages = 1
+                deadline = None
             
-            next_page_token = search_response.get('nextPageToken')
+            emitted = 0
+            overflow = []
+            pages_fetched = 0
+            quota_stopped = False
+            ranked = TopK(top_k, sort_key) if top_k else None
+            held = [] if sort_key and not top_k else None
             
-            # Get video IDs
-            video_ids = [item['id']['videoId'] for item in search_response.get('items', [])]
+            def accept(video: Dict) -> bool:
+                """Take a result that passed the filters; True if it is to be yielded now"""
+                nonlocal emitted
+                if ranked is not None:
+                    ranked.push(video)
+                elif emitted < max_results:
+                    emitted += 1
+                    if held is None:
+                        return True
+                    held.append(video)
+                else:
+                    overflow.append(video['id'])
+                return False
             
-            if not video_ids:
-                return {"videos": [], "total": 0}
+            if ranked is not None:
+                # Every page within the budgets is needed to rank
+                needed = lambda: float('inf')
+            else:
+                needed = lambda: max_results - emitted
             
-            # Get video statistics and content details
-            videos_response = youtube.videos().list(
-                part='statistics,snippet,contentDetails',
-                id=','.join(video_ids)
-            ).execute()
+            # Results left over from the previous page come first
+            if cursor.buffered:
+                with timer.stage('buffer'):
+                    buffered = await self._hydrate_video_ids(cursor.buffered)
+                for video in self._apply_filters(buffered, min_ratio, min_comments, tag):
+                    if accept(video):
+                        yield 'video', project(video, projection)
             
-            # Get channel IDs to fetch subscriber counts
-            channel_ids = list(set(item['snippet']['channelId'] for item in videos_response.get('items', [])))
+            # A first request starts at the first upstream page; a cursor
+            # without an upstream token means the search is exhausted
+            if (not page_token or cursor.upstream) and emitted < max_results:
+                if large or top_k:
+                    # Many pages: overlap their search.list calls and hydration
+                    pages = self._pipeline_pages(
+                        query, page_size, order, published_after, video_duration, cursor.upstream,
+                        max_pages, deadline, needed, timer, settings.large_result_pipeline_depth
+                    )
+                else:
+                    pages = self._iter_pages(
+                        query, page_size, order, published_after, video_duration, cursor.upstream,
+                        max_pages, deadline, needed, timer
+                    )
+                try:
+                    async for page in pages:
+                        pages_fetched += 1
+                        cursor.upstream = page['nextPageToken']
+                        with timer.stage('filter'):
+                            fresh = [
+                                video for video in self._apply_filters(page['videos'], min_ratio, min_comments, tag)
+                                if not cursor.is_seen(video['id'])
+                            ]
+                            cursor.mark_seen(video['id'] for video in fresh)
+                        for video in fresh:
+                            if accept(video):
+                                yield 'video', project(video, projection)
+                        if needed() <= 0:
+                            break
+                except QuotaExceededError:
+                    # Out of budget: return what we have, the cursor resumes later
+                    if not (emitted or ranked):
+                        raise
+                    quota_stopped = True
+                finally:
+                    await pages.aclose()
             
-            # Fetch channel details
-            channels_data = {}
-            if channel_ids:
-                channels_response = youtube.channels().list(
-                    part='statistics',
-                    id=','.join(channel_ids)
-                ).execute()
-                
-                for item in channels_response.get('items', []):
-                    channels_data[item['id']] = int(item['statistics'].get('subscriberCount', 0))
-            
-            # Format response and filter by ratio
-            videos = []
-            for item in videos_response.get('items', []):
-                view_count = int(item['statistics'].get('viewCount', 0))
-                channel_id = item['snippet']['channelId']
-                subscriber_count = channels_data.get(channel_id, 0)
-                
-                # Calculate ratio
-                ratio = 0
-                if subscriber_count > 0:
-                    ratio = (view_count / subscriber_count) * 100
-                
-                # Filter by min_ratio if specified
-                if min_ratio is not None and ratio < min_ratio:
-                    continue
-
-                # Filter by min_comments if specified
-                comment_count = int(item['statistics'].get('commentCount', 0))
-                if min_comments is not None and comment_count < min_comments:
-                    continue
-                
-                # Filter by tag if specified
-                video_tags = item['snippet'].get('tags', [])
-                if tag:
-                    tag_lower = tag.lower()
-                    if not any(t.lower() == tag_lower for t in video_tags):
-                        continue
-                    
-                video_data = {
-                    'id': item['id'],
-                    'title': item['snippet']['title'],
-                    'description': item['snippet']['description'],
-                    'channelTitle': item['snippet']['channelTitle'],
-                    'publishedAt': item['snippet']['publishedAt'],
-                    'thumbnails': item['snippet']['thumbnails'],
-                    'tags': video_tags,
-                    'statistics': {
-                        'viewCount': view_count,
-                        'likeCount': int(item['statistics'].get('likeCount', 0)),
-                        'commentCount': comment_count,
-                        'subscriberCount': subscriber_count,
-                        'viewSubscriberRatio': round(ratio, 2)
-                    }
-                }
-                videos.append(video_data)
+            cursor.buffered = overflow
             
-            return {
-                "videos": videos,
-                "total": len(videos),
+            if ranked is not None:
+                held = ranked.items()
+                emitted = len(held)
+            elif held is not None:
+                held.sort(key=sort_key, reverse=True)
+            for video in held or []:
+                yield 'video', project(video, projection)
+            
+            summary = {
+                "total": emitted,
                 "query": query,
                 "order": order,
-                "nextPageToken": next_page_token
+                "nextPageToken": cursor.encode() if ranked is None else None,
+                "cached": usage.units == 0,
+                "pagesFetched": pages_fetched,
+                "quotaUsed": usage.units,
+                "timings": timer.as_dict()
             }
+            if sort_by:
+                summary["sortBy"] = sort_by
+            if ranked is not None:
+                summary["scanned"] = ranked.pushed
+            if fill or top_k or large:
+                if ranked is None and emitted >= max_results:
+                    summary["stopReason"] = "filled"
+                elif not cursor.upstream:
+                    summary["stopReason"] = "exhausted"
+                elif quota_stopped:
+                    summary["stopReason"] = "quota_budget"
+                elif pages_fetched >= max_pages:
+                    summary["stopReason"] = "page_budget"
+                else:
+                    summary["stopReason"] = "time_budget"
+            yield 'summary', summary
             
-        except HttpError as e:
-            error_message = f"YouTube API error: {e.resp.status} - {e.content.decode()}"
-            raise Exception(error_message)
+        except QuotaExceededError:
+            raise
+        except YouTubeApiError as e:
+            raise Exception(str(e))
         except Exception as e:
             raise Exception(f"Error searching videos: {str(e)}")
     
-    def get_video_details(self, video_id: str) -> Optional[Dict]:
+    def _format_video_details(self, item: Dict) -> Dict:
+        """Map a videos.list item to our video details format"""
+        return {
+            'id': item['id'],
+            'title': item['snippet']['title'],
+            'description': item['snippet']['description'],
+            'channelTitle': item['snippet']['channelTitle'],
+            'publishedAt': item['snippet']['publishedAt'],
+            'thumbnails': item['snippet']['thumbnails'],
+            'statistics': {
+                'viewCount': int(item['statistics'].get('viewCount', 0)),
+                'likeCount': int(item['statistics'].get('likeCount', 0)),
+                'commentCount': int(item['statistics'].get('commentCount', 0))
+            }
+        }
+
+    async def get_video_details(
+        self,
+        video_id: str,
+        user: Optional[str] = None,
+        fields: Optional[str] = None
+    ) -> Optional[Dict]:
         """
         Get detailed information about a specific video
         
         Args:
             video_id: YouTube video ID
+            user: Caller identity for per-user quota budgets
+            fields: Projection of the returned video (see projection.parse_fields)
         
         Returns:
             Dictionary with video details or None if not found
         """
-        if not self.youtube:
-            raise ValueError("YouTube API key not configured")
-        
+        projection = parse_fields(fields)
         try:
-            response = self.youtube.videos().list(
-                part='statistics,snippet,contentDetails',
-                id=video_id
-            ).execute()
-            
-            items = response.get('items', [])
+            track_quota_usage(user)
+            items = await self._fetch_video_items([video_id])
             if not items:
                 return None
+            return project(self._format_video_details(items[0]), projection)
+            
+        except QuotaExceededError:
+            raise
+        except YouTubeApiError as e:
+            raise Exception(str(e))
+        except Exception as e:
+            raise Exception(f"Error getting video details: {str(e)}")
+
+    async def get_videos_batch(
+        self,
+        video_ids: List[str],
+        user: Optional[str] = None,
+        fields: Optional[str] = None
+    ) -> Dict:
+        """
+        Get details for many videos at once
+        
+        Uncached IDs are fetched in concurrent videos.list calls of 50 IDs,
+        so 300 videos cost at most 6 upstream calls.
+        
+        Args:
+            video_ids: YouTube video IDs (up to MAX_BATCH_IDS)
+            user: Caller identity for per-user quota budgets
+            fields: Projection of the returned videos (see projection.parse_fields)
+        
+        Returns:
+            Dictionary with found videos (in input order) and the IDs not found
+        """
+        video_ids = list(dict.fromkeys(v.strip() for v in video_ids if v and v.strip()))
+        if not video_ids:
+            raise ValueError("No video IDs given")
+        if len(video_ids) > MAX_BATCH_IDS:
+            raise ValueError(f"At most {MAX_BATCH_IDS} video IDs per batch")
+        projection = parse_fields(fields)
+        
+        try:
+            track_quota_usage(user)
+            items = await self.video_cache.get_many(video_ids, self._fetch_video_batch)
             
-            item = items[0]
             return {
-                'id': item['id'],
-                'title': item['snippet']['title'],
-                'description': item['snippet']['description'],
-                'channelTitle': item['snippet']['channelTitle'],
-                'publishedAt': item['snippet']['publishedAt'],
-                'thumbnails': item['snippet']['thumbnails'],
-                'statistics': {
-                    'viewCount': int(item['statistics'].get('viewCount', 0)),
-                    'likeCount': int(item['statistics'].get('likeCount', 0)),
-                    'commentCount': int(item['statistics'].get('commentCount', 0))
-                }
+                "videos": [project(self._format_video_details(items[v]), projection) for v in video_ids if v in items],
+                "notFound": [v for v in video_ids if v not in items],
+                "total": len(items)
             }
             
-        except HttpError as e:
-            error_message = f"YouTube API error: {e.resp.status} - {e.content.decode()}"
-            raise Exception(error_message)
+        except QuotaExceededError:
+            raise
+        except YouTubeApiError as e:
+            raise Exception(str(e))
         except Exception as e:
             raise Exception(f"Error getting video details: {str(e)}")
 